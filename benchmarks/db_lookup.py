@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""Lookup latency of a scrape database before and after create_indexes.
+
+Builds a temporary database with the t_ids, t_messages, o_urls and edges
+tables, fills them with synthetic rows and times the lookups the scraper
+runs while crawling, first on the plain tables, then with the indexes and
+pragmas of scraper_db.
+
+usage: python3 benchmarks/db_lookup.py [rows]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from scraper_db import set_pragmas, create_indexes
+
+LOOKUPS = 50
+
+
+def fill(connection, rows):
+    connection.executescript('''
+        CREATE TABLE t_ids (id INTEGER PRIMARY KEY AUTOINCREMENT, t_id BIGINT,
+            t_session_name CHAR(512), t_type CHAR(512), hop INTEGER,
+            msg_count INTEGER, scrape_state CHAR(512), last_check TIMESTAMP);
+        CREATE TABLE t_messages (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_id BIGINT, message_id BIGINT, sender_id BIGINT,
+            raw_text CHAR(512), web_preview_url CHAR(512), time TIMESTAMP);
+        CREATE TABLE o_urls (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url CHAR(512), short CHAR(512));
+        CREATE TABLE edges (source INTEGER NOT NULL, target INTEGER NOT NULL,
+            message_id INTEGER, timestamp REAL, hop INTEGER);
+    ''')
+    connection.executemany(
+        'INSERT INTO t_ids (t_id, t_session_name, t_type, hop, msg_count, '
+        'scrape_state) VALUES (?, "s1", "contact", ?, 0, "Finished");',
+        ((1000000000 + i, i % 3) for i in range(rows)))
+    connection.executemany(
+        'INSERT INTO t_messages (entity_id, message_id, sender_id, raw_text) '
+        'VALUES (?, ?, ?, "text");',
+        ((1000000000 + i % 1000, i, 1000000000 + i) for i in range(rows)))
+    connection.executemany(
+        'INSERT INTO o_urls (url, short) VALUES (?, ?);',
+        (('https://example.org/' + str(i), 'https://tinyurl.com/' + str(i))
+         for i in range(rows)))
+    connection.executemany(
+        'INSERT INTO edges (source, target, message_id) VALUES (?, ?, ?);',
+        ((i, (i * 7) % rows, i) for i in range(rows)))
+    connection.commit()
+
+
+def measure(connection, rows):
+    queries = [
+        ('t_ids.t_id', 'SELECT * FROM t_ids WHERE t_id = ?;',
+         lambda: (1000000000 + random.randrange(rows),)),
+        ('t_messages.entity_id/message_id',
+         'SELECT * FROM t_messages WHERE entity_id = ? AND message_id = ?;',
+         lambda: (1000000000 + random.randrange(1000), random.randrange(rows))),
+        ('o_urls.url', 'SELECT * FROM o_urls WHERE url = ?;',
+         lambda: ('https://example.org/' + str(random.randrange(rows)),)),
+        ('edges.source', 'SELECT * FROM edges WHERE source = ?;',
+         lambda: (random.randrange(rows),)),
+        ('edges.target', 'SELECT * FROM edges WHERE target = ?;',
+         lambda: (random.randrange(rows),)),
+    ]
+    results = {}
+    for name, sql, params in queries:
+        start = time.perf_counter()
+        for i in range(LOOKUPS):
+            connection.execute(sql, params()).fetchall()
+        results[name] = (time.perf_counter() - start) / LOOKUPS * 1000
+    return results
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else 1000000
+    random.seed(470151198)
+    with tempfile.TemporaryDirectory() as folder:
+        connection = sqlite3.connect(os.path.join(folder, 'bench.sqlite'))
+        print('Filling tables with ' + str(rows) + ' rows each')
+        fill(connection, rows)
+        before = measure(connection, rows)
+        start = time.perf_counter()
+        set_pragmas(connection)
+        create_indexes(connection)
+        print('create_indexes took ' +
+              str(round(time.perf_counter() - start, 2)) + ' s')
+        after = measure(connection, rows)
+        connection.close()
+
+    print('{:<34}{:>14}{:>14}'.format('lookup', 'before [ms]', 'after [ms]'))
+    for name in before:
+        print('{:<34}{:>14.3f}{:>14.3f}'.format(name, before[name], after[name]))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
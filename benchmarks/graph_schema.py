@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""Size and graph load time of the mentions table vs. the nodes and edges tables.
+
+Builds a temporary database with a mentions table as written by scrapers
+before scraper_db.migrate_mentions existed, with names instead of IDs,
+and times loading all edges with the names of their nodes. The database
+is then migrated to nodes and edges and the same load is timed again,
+once with the node labels like analyze() and once by node id.
+
+usage: python3 benchmarks/graph_schema.py [mentions]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from scraper_db import create_indexes, migrate_mentions
+
+ENTITIES = 20000
+
+
+def fill(connection, mentions):
+    connection.executescript('''
+        CREATE TABLE t_ids (id INTEGER PRIMARY KEY AUTOINCREMENT, t_id BIGINT,
+            t_type CHAR(512), hop INTEGER);
+        CREATE TABLE t_contacts (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_id BIGINT, is_bot CHAR(1), user_name CHAR(512),
+            phone_number CHAR(512));
+        CREATE TABLE t_chats (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id BIGINT, chat_username CHAR(512));
+        CREATE TABLE o_urls (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url CHAR(512), short CHAR(512));
+        CREATE TABLE mentions (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source CHAR(512), s_type CHAR(512), content CHAR(512),
+            c_type CHAR(512), message_id CHAR(512), timestamp CHAR(512),
+            hop CHAR(512));
+    ''')
+    connection.executemany(
+        'INSERT INTO t_ids (t_id, t_type) VALUES (?, "contact");',
+        ((1000000000 + i,) for i in range(ENTITIES)))
+    connection.executemany(
+        'INSERT INTO t_contacts (contact_id, is_bot, user_name) '
+        'VALUES (?, "F", ?);',
+        ((1000000000 + i, 'user_name_' + str(i)) for i in range(ENTITIES)))
+    connection.executemany(
+        'INSERT INTO o_urls (url, short) VALUES (?, ?);',
+        (('https://example.org/a/long/path/' + str(i),
+          'https://tinyurl.com/' + str(i)) for i in range(ENTITIES)))
+    rows = []
+    for i in range(mentions):
+        if random.random() < 0.7:
+            content = 'user_name_' + str(random.randrange(ENTITIES))
+            c_type = 'contact'
+        else:
+            content = 'https://tinyurl.com/' + str(random.randrange(ENTITIES))
+            c_type = 'url'
+        rows.append(('user_name_' + str(random.randrange(ENTITIES)), 'contact',
+                     content, c_type, str(i),
+                     '2022-05-01 12:00:00+00:00', str(random.randrange(3))))
+    connection.executemany(
+        'INSERT INTO mentions (source, s_type, content, c_type, message_id, '
+        'timestamp, hop) VALUES (?, ?, ?, ?, ?, ?, ?);', rows)
+    connection.commit()
+
+
+def load(connection, sql, labels=False):
+    # adjacency as analyze() builds it, keyed by whatever the query returns
+    # or by the labels of the node ids
+    start = time.perf_counter()
+    graph = {}
+    if labels:
+        names = dict(connection.execute('SELECT id, label FROM nodes;'))
+    for source, target in connection.execute(sql):
+        if labels:
+            source = names[source]
+            target = names[target]
+        graph.setdefault(source, {})
+        graph[source][target] = graph[source].get(target, 0) + 1
+    return time.perf_counter() - start
+
+
+def main(argv):
+    mentions = int(argv[1]) if len(argv) > 1 else 1000000
+    random.seed(470151198)
+    with tempfile.TemporaryDirectory() as folder:
+        file = os.path.join(folder, 'bench.sqlite')
+        connection = sqlite3.connect(file)
+        print('Filling mentions with ' + str(mentions) + ' rows')
+        fill(connection, mentions)
+        connection.execute('VACUUM;')
+        before_size = os.path.getsize(file)
+        before = load(connection, 'SELECT source, content FROM mentions;')
+
+        start = time.perf_counter()
+        migrate_mentions(connection)
+        create_indexes(connection)
+        print('migrate_mentions took ' +
+              str(round(time.perf_counter() - start, 2)) + ' s')
+        after_size = os.path.getsize(file)
+        by_label = load(connection, 'SELECT source, target FROM edges;', True)
+        by_id = load(connection, 'SELECT source, target FROM edges;')
+        connection.close()
+
+    print('{:<26}{:>12}{:>14}'.format('', 'size [MB]', 'load [s]'))
+    print('{:<26}{:>12.1f}{:>14.2f}'.format('mentions', before_size / 2 ** 20,
+                                            before))
+    print('{:<26}{:>12.1f}{:>14.2f}'.format('nodes + edges, by label',
+                                            after_size / 2 ** 20, by_label))
+    print('{:<26}{:>12}{:>14.2f}'.format('nodes + edges, by id', '', by_id))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
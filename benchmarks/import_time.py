@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Cold start import times of the scraper modules, measured with -X importtime.
+
+Every module is imported by a fresh interpreter, so nothing is cached in
+sys.modules. The cumulative import time of scraper_service, which every
+command loads, has to stay below IMPORT_BUDGET. Each module must also not
+import the libraries listed for it, so scraping, merging and analysis only
+load what they use. Exits with 1 on a regression, modules whose own
+dependencies are not installed are skipped.
+
+usage: python3 benchmarks/import_time.py [budget in ms]   (from the directory of scraper.ini)
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# milliseconds, cumulative import time of scraper_service
+IMPORT_BUDGET = 100
+
+TELEGRAM = ['telethon']
+ANALYSIS = ['networkx', 'networkit', 'matplotlib', 'powerlaw', 'sklearn',
+            'sklearn_som', 'nltk', 'reportlab']
+
+# module -> top level packages it must not import
+MODULES = [
+    ('scraper_service', TELEGRAM + ANALYSIS + ['pydal', 'asyncio']),
+    ('scraper_engine', ANALYSIS),
+    ('scraper_merge', TELEGRAM + ANALYSIS),
+    ('scraper_analysis', TELEGRAM + ['networkx', 'networkit', 'matplotlib',
+                                     'powerlaw', 'sklearn', 'sklearn_som',
+                                     'nltk']),
+]
+
+
+def import_times(module):
+    # {imported module: cumulative microseconds} or None if the import failed
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET
+    failed = False
+    for module, forbidden in MODULES:
+        times = import_times(module)
+        if times is None:
+            print(module + ': dependencies not installed, skipped')
+            continue
+        loaded = sorted(set(name.split('.')[0] for name in times)
+                        .intersection(forbidden))
+        milliseconds = times[module] / 1000
+        status = 'ok'
+        if loaded:
+            status = 'imports ' + ', '.join(loaded)
+            failed = True
+        elif module == 'scraper_service' and milliseconds > budget:
+            status = 'over budget of ' + str(budget) + ' ms'
+            failed = True
+        print(module + ': ' + str(round(milliseconds, 1)) + ' ms, ' + status)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
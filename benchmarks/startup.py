@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Startup time of the scraper for commands that do not need Telegram.
+
+Times the import of scraper_service and the creation of a ScraperService,
+which must not connect any session. Exits with 1 if one of them takes
+longer than its budget, so it can be used as a regression check.
+
+usage: python3 benchmarks/startup.py   (from the directory of scraper.ini)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# seconds
+IMPORT_BUDGET = 0.5
+INIT_BUDGET = 0.5
+
+
+def main():
+    start = time.perf_counter()
+    from scraper_service import ScraperService
+    import_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service = ScraperService()
+    init_time = time.perf_counter() - start
+
+    failed = False
+    for name, measured, budget in [('import', import_time, IMPORT_BUDGET),
+                                   ('ScraperService()', init_time, INIT_BUDGET)]:
+        status = 'ok'
+        if measured > budget:
+            status = 'over budget'
+            failed = True
+        print(name + ': ' + str(round(measured, 3)) + ' s, budget ' +
+              str(budget) + ' s, ' + status)
+    if service.connected:
+        print('ScraperService() connected the sessions!')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""Message text extraction, per keyword and per pattern vs. scraper_scan.
+
+Generates a synthetic corpus of messages with words, usernames, URLs,
+Telegram and invitation links and keywords, then times the extraction the
+scraper ran on every message before scraper_scan existed against one
+TextScanner.scan per message. Both runs see the same messages.
+
+usage: python3 benchmarks/text_scan.py [messages] [keywords]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from scraper_scan import TextScanner
+
+WORDS = ['the', 'new', 'channel', 'today', 'market', 'free', 'join', 'now',
+         'price', 'update', 'group', 'link', 'video', 'read', 'more', 'here',
+         'Telegram', 'best', 'offer', 'news', 'from', 'with', 'about', 'for']
+
+
+def corpus(messages, keywords, seed=1):
+    generator = random.Random(seed)
+    for i in range(messages):
+        words = []
+        for j in range(generator.randint(5, 60)):
+            choice = generator.random()
+            if choice < 0.02:
+                words.append('@user_' + str(generator.randint(0, 99999)))
+            elif choice < 0.03:
+                words.append('https://example.org/page/' +
+                             str(generator.randint(0, 99999)))
+            elif choice < 0.035:
+                words.append('https://t.me/channel_' +
+                             str(generator.randint(0, 9999)))
+            elif choice < 0.037:
+                words.append('https://t.me/joinchat/' +
+                             str(generator.randint(0, 999999)))
+            elif choice < 0.045:
+                words.append(generator.choice(keywords).upper())
+            else:
+                words.append(generator.choice(WORDS))
+        yield ' '.join(words)
+
+
+def find_urls(string):
+    regex = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.]" \
+            r"[a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]" \
+            r"+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|" \
+            r"[^\s`!()\[\]{};:'\".,<>?    «»“”‘’]))"
+    url = re.findall(regex, string)
+    return [x[0] for x in url]
+
+
+def scan_old(text, keywords):
+    # extraction as done by process_message before scraper_scan
+    found = 0
+    for keyword in keywords:
+        if keyword.lower() in text.lower():
+            found += 1
+    found += len(re.findall(r"\B@\w{5,32}\b", text))
+    for url in find_urls(text):
+        if re.search(r"^(https:\/\/)?(t|telegram)\.(me|org|dog)", url,
+                     flags=re.IGNORECASE):
+            re.search(r"(?:t|telegram)\.(?:me|org|dog)\/(joinchat\/|\+){1}([\w-]+)",
+                      url, flags=re.IGNORECASE)
+        found += 1
+    return found
+
+
+def scan_new(scanner, text):
+    result = scanner.scan(text)
+    return len(set(hit[0] for hit in result.keywords)) + \
+        len(result.usernames) + len(result.urls)
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    keywords = ['keyword' + str(i) for i in range(count)]
+    scanner = TextScanner(keywords)
+
+    # generating the messages is part of both runs and subtracted
+    start = time.perf_counter()
+    for text in corpus(messages, keywords):
+        pass
+    generate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    old = sum(scan_old(text, keywords) for text in corpus(messages, keywords))
+    old_time = time.perf_counter() - start - generate_time
+
+    start = time.perf_counter()
+    new = sum(scan_new(scanner, text) for text in corpus(messages, keywords))
+    new_time = time.perf_counter() - start - generate_time
+
+    print(str(messages) + ' messages, ' + str(count) + ' keywords')
+    print('per pattern:  ' + str(round(old_time, 2)) + ' s, ' +
+          str(old) + ' hits')
+    print('TextScanner:  ' + str(round(new_time, 2)) + ' s, ' +
+          str(new) + ' hits')
+
+
+if __name__ == '__main__':
+    main()
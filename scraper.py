@@ -8,7 +8,7 @@ import sys
 from curses.ascii import isdigit
 from datetime import datetime
 from glob import glob
-from scraper_model import SessionError, RequestError, ScrapeError
+from scraper_model import SessionError, SessionState, RequestError, ScrapeError
 from scraper_service import ScraperService
 
 def pause():
@@ -34,13 +34,14 @@ def main(argv):
     -n <seed> --new <seed>
     -k <keyword> --keyword <keyword>
     -s --scrape
+    -r <folder> --refresh <folder>
     -a --analyze <folder>'''
     
         try:
             opts, args = getopt.getopt(
                 argv[1:], 
-                "hn:k:sa:", 
-                ["help", "new=", "keyword=", "scrape", "analyze="])
+                "hn:k:sr:a:", 
+                ["help", "new=", "keyword=", "scrape", "refresh=", "analyze="])
             
         except:
             print(arg_help)
@@ -71,6 +72,15 @@ def main(argv):
                 print("Scraping")
                 service.scrape()
                 
+            elif opt in ("-r", "--refresh"):
+                arg_folder = arg
+                file_path = os.path.join('data', arg_folder, arg_folder + "_scrape.sqlite")
+                if not os.path.exists(file_path):
+                    print("No sqlite database " + str(file_path) + " found!")   
+                else:
+                    print("refreshing " + arg_folder)
+                    service.refresh(arg_folder)
+
             elif opt in ("-a", "--analyze"):
                 arg_folder = arg
                 file_path = os.path.join('data', arg_folder, arg_folder + "_scrape.sqlite")
@@ -99,6 +109,7 @@ def main(argv):
             print(" 8. Merge scraped data")
             print(" 9. Remove scraped data")
             print("10. Clear __pycache__ directory")
+            print("11. Refresh scraped data")
             print(" 0. Exit")
             print("--------------------------------------------")
             print("start with -h to see command line arguments")
@@ -115,12 +126,19 @@ def main(argv):
                         print("--> Name: " + mySession.name)
                         print("--> api_id: " + str(mySession.api_id))
                         print("--> api_hash: " + str(mySession.api_id))
-                        print("--> Status: " + mySession.State.name)
+                        # sessions are only connected for scraping
+                        if service.connected or \
+                                mySession.State != SessionState.Closed:
+                            print("--> Status: " + mySession.State.name)
+                        else:
+                            print("--> Status: not connected yet")
                         wait_until = datetime.fromtimestamp(mySession.wait_until)
                         if wait_until > datetime.now():
                             print("--> FloodWait blocking until: " + str(wait_until))
                         else:
                             print("--> No active FloodWait blocking")
+                        print("--> Request rate: " +
+                            str(round(mySession.limiter.rate, 3)) + " per second")
                     print("--------------------------------------------")
 
                 elif userSelection == 2:
@@ -189,6 +207,10 @@ def main(argv):
                                     # Set wait_until to 0
                                     service.set_ini(
                                         section_name, "wait_until", str(0))
+                                    service.set_ini(
+                                        section_name, "rate", "")
+                                    service.set_ini(
+                                        section_name, "dialogs_loaded", "")
                                     print("New session entry:")
                                     print("Slot: " + section_name)
                                     print(
@@ -237,6 +259,8 @@ def main(argv):
                                     service.set_ini(section_name, "api_id", "")
                                     service.set_ini(section_name, "api_hash", "")
                                     service.set_ini(section_name, "wait_until", "")
+                                    service.set_ini(section_name, "rate", "")
+                                    service.set_ini(section_name, "dialogs_loaded", "")
                                     print("Cleared session entry:")
                                     print("Slot: " + section_name)
                                     print(
@@ -337,26 +361,44 @@ def main(argv):
                     print("--> DEFAULT -> hops = " + str(service.iniValues.hops))
                     print("--> Telegram -> max_messages = " +
                         str(service.iniValues.max_messages))
-                    print("--> Telegram -> min_wait = " +
-                        str(service.iniValues.min_wait))
-                    print("--> Telegram -> max_wait = " +
-                        str(service.iniValues.max_wait))
+                    print("--> Telegram -> min_rate = " +
+                        str(service.iniValues.min_rate))
+                    print("--> Telegram -> max_rate = " +
+                        str(service.iniValues.max_rate))
                     print("--> Telegram -> max_delay = " +
                         str(service.iniValues.max_delay))
                     print("--> Telegram -> follow_invitations = " +
                         str(service.iniValues.follow_invitations))
+                    print("--> Telegram -> parallel = " +
+                        str(service.iniValues.parallel))
+                    print("--> Telegram -> batch_size = " +
+                        str(service.iniValues.batch_size))
+                    print("--> Telegram -> priority = " +
+                        str(service.iniValues.priority))
                     print("--> URL -> use_short = " +
                         str(service.iniValues.use_short))
+                    print("--> URL -> shortener = " +
+                        str(service.iniValues.shortener))
+                    print("--> DEFAULT -> keyword_match = " +
+                        str(service.iniValues.keyword_match))
+                    print("--> DEFAULT -> merge_conflicts = " +
+                        str(service.iniValues.merge_conflicts))
                     print("--------------------------------------------")
                     print("Select operation:")
                     print("1. Set DEFAULT -> examiner")
                     print("2. Set DEFAULT -> hops")
                     print("3. Set Telegram -> max_messages")
-                    print("4. Set Telegram -> min_wait")
-                    print("5. Set Telegram -> max_wait")
+                    print("4. Set Telegram -> min_rate")
+                    print("5. Set Telegram -> max_rate")
                     print("6. Set Telegram -> max_delay")
                     print("7. Set Telegram -> follow_invitations")
                     print("8. Set URL -> use_short")
+                    print("9. Set Telegram -> parallel")
+                    print("10. Set Telegram -> batch_size")
+                    print("11. Set URL -> shortener")
+                    print("12. Set DEFAULT -> keyword_match")
+                    print("13. Set Telegram -> priority")
+                    print("14. Set DEFAULT -> merge_conflicts")
                     print("0. Return to Main")
                     print("--------------------------------------------")
                     userInput = input("Enter number: ")
@@ -409,38 +451,39 @@ def main(argv):
                         elif userSelection == 4:
                             section = "Telegram"
                             print(
-                                "Positive integer, minimum value = 0, maximim value = 100")
+                                "Positive number, minimum value = 0.01, maximim value = max_rate")
                             print(
-                                "lower border of randomized wait time in Seconds between")
-                            print("Telegram API calls, to prevent Floodwait Errors")
-                            print("Values above 0 slow down scraping notably")
-                            newMinWait = str(input("Enter new min_wait value: "))
-                            if newMinWait.isdigit():
-                                if int(newMinWait) >= 0 and int(newMinWait) <= 100:
-                                    service.set_ini(
-                                        section, "min_wait", newMinWait)
+                                "lowest rate of Telegram API requests per second and session.")
+                            print("Each FloodWait error halves the rate of a session,")
+                            print("but never below this value.")
+                            newMinRate = str(input("Enter new min_rate value: "))
+                            try:
+                                if float(newMinRate) >= 0.01 \
+                                        and float(newMinRate) <= service.iniValues.max_rate:
+                                    service.set_ini(
+                                        section, "min_rate", newMinRate)
                                 else:
                                     print("Invalid selection!")
-                            else:
+                            except ValueError:
                                 print("Invalid selection!")
 
                         elif userSelection == 5:
                             section = "Telegram"
                             print(
-                                "Positive integer, minimum value > min_wait, maximim value = 100")
+                                "Positive number, minimum value = min_rate, maximim value = 30")
                             print(
-                                "upper border of randomized wait time in Seconds between")
-                            print("Telegram API calls, to prevent Floodwait Errors.")
-                            print("High values slow down scraping notably")
-                            newMaxWait = str(input("Enter new min_wait value: "))
-                            if newMaxWait.isdigit():
-                                if int(newMaxWait) >= int(service.iniValues.min_wait) \
-                                        and int(newMaxWait) <= 100:
-                                    service.set_ini(
-                                        section, "max_wait", newMaxWait)
+                                "highest rate of Telegram API requests per second and session.")
+                            print("After a FloodWait error the rate of a session recovers")
+                            print("slowly towards this value.")
+                            newMaxRate = str(input("Enter new max_rate value: "))
+                            try:
+                                if float(newMaxRate) >= service.iniValues.min_rate \
+                                        and float(newMaxRate) <= 30:
+                                    service.set_ini(
+                                        section, "max_rate", newMaxRate)
                                 else:
                                     print("Invalid selection!")
-                            else:
+                            except ValueError:
                                 print("Invalid selection!")
 
                         elif userSelection == 6:
@@ -495,6 +538,110 @@ def main(argv):
                             else:
                                 print("Invalid selection!")
 
+                        elif userSelection == 9:
+                            section = "Telegram"
+                            print("Boolean, 1 = True, 0 = False")
+                            print(
+                                "Should all sessions scrape concurrently?")
+                            newParallel = str(input("Enter new parallel value: "))
+                            if newParallel.isdigit():
+                                if int(newParallel) == 0:
+                                    service.set_ini(section, "parallel", "False")
+                                elif int(newParallel) == 1:
+                                    service.set_ini(section, "parallel", "True")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 10:
+                            section = "Telegram"
+                            print(
+                                "Positive integer, minimum value = 1, maximim value = 100000")
+                            print("Number of messages that are written to the database")
+                            print("together in one transaction.")
+                            newBatchSize = str(input("Enter new batch_size value: "))
+                            if newBatchSize.isdigit():
+                                if int(newBatchSize) >= 1 and int(newBatchSize) <= 100000:
+                                    service.set_ini(
+                                        section, "batch_size", newBatchSize)
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 11:
+                            section = "URL"
+                            print("1 = tinyurl, 2 = local")
+                            print("tinyurl shortens URLs in the background with TinyURL,")
+                            print("local creates hash based IDs without network access.")
+                            newShortener = str(input("Enter new shortener value: "))
+                            if newShortener.isdigit():
+                                if int(newShortener) == 1:
+                                    service.set_ini(section, "shortener", "tinyurl")
+                                elif int(newShortener) == 2:
+                                    service.set_ini(section, "shortener", "local")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 12:
+                            section = "DEFAULT"
+                            print("1 = substring, 2 = word, 3 = stem")
+                            print("substring finds keywords also inside of words, word only")
+                            print("matches whole words and phrases, stem also matches inflected words.")
+                            newMatch = str(input("Enter new keyword_match value: "))
+                            if newMatch.isdigit():
+                                if int(newMatch) == 1:
+                                    service.set_ini(section, "keyword_match", "substring")
+                                elif int(newMatch) == 2:
+                                    service.set_ini(section, "keyword_match", "word")
+                                elif int(newMatch) == 3:
+                                    service.set_ini(section, "keyword_match", "stem")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 13:
+                            section = "Telegram"
+                            print("1 = hop, 2 = mentions, 3 = type")
+                            print("Order in which found entities are scraped: lower hops first,")
+                            print("most mentioned first or chats, then channels, then contacts.")
+                            newPriority = str(input("Enter new priority value: "))
+                            if newPriority.isdigit():
+                                if int(newPriority) == 1:
+                                    service.set_ini(section, "priority", "hop")
+                                elif int(newPriority) == 2:
+                                    service.set_ini(section, "priority", "mentions")
+                                elif int(newPriority) == 3:
+                                    service.set_ini(section, "priority", "type")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 14:
+                            section = "DEFAULT"
+                            print("1 = newer, 2 = first, 3 = last, 4 = interactive")
+                            print("Which row is kept when merged Datasets scraped the same entity:")
+                            print("the newer one, the one of the Dataset listed first or last, or ask.")
+                            newConflicts = str(input("Enter new merge_conflicts value: "))
+                            if newConflicts.isdigit():
+                                if int(newConflicts) == 1:
+                                    service.set_ini(section, "merge_conflicts", "newer")
+                                elif int(newConflicts) == 2:
+                                    service.set_ini(section, "merge_conflicts", "first")
+                                elif int(newConflicts) == 3:
+                                    service.set_ini(section, "merge_conflicts", "last")
+                                elif int(newConflicts) == 4:
+                                    service.set_ini(section, "merge_conflicts", "interactive")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
                 elif userSelection == 5:
                     print("\033[H\033[2J", end="")
                     print("5 - Scraping")
@@ -525,6 +672,20 @@ def main(argv):
                         str(service.iniValues.o_entities))
                     print("--> Analyze -> keys = " +
                         str(service.iniValues.keys))
+                    print("--> Analyze -> threads = " +
+                        str(service.iniValues.threads))
+                    print("--> Analyze -> precision = " +
+                        str(service.iniValues.precision))
+                    print("--> Analyze -> epsilon = " +
+                        str(service.iniValues.epsilon))
+                    print("--> Analyze -> samples = " +
+                        str(service.iniValues.samples))
+                    print("--> Analyze -> cache = " +
+                        str(service.iniValues.analysis_cache))
+                    print("--> Analyze -> workers = " +
+                        str(service.iniValues.workers))
+                    print("--> Analyze -> extra_metrics = " +
+                        str(service.iniValues.extra_metrics))
                     print("--------------------------------------------")
                     print("Select operation:")
                     print("Section \"Analyze\"")
@@ -538,6 +699,11 @@ def main(argv):
                     print(" 8. Include urls")
                     print(" 9. Include o_entities")
                     print("10. Include keywords")
+                    print("11. Set threads")
+                    print("12. Set precision")
+                    print("13. Use analysis cache")
+                    print("14. Set workers")
+                    print("15. Use extra_metrics")
                     print(" 0. Return to Main")
                     print("--------------------------------------------")
                     userInput = input("Enter number: ")
@@ -729,6 +895,82 @@ def main(argv):
                             else:
                                 print("Invalid selection!")
 
+                        elif userSelection == 11:
+                            section = "Analyze"
+                            print("Positive integer, minimum vaule = 0")
+                            print("threads used by the networkit algorithms of the analysis,")
+                            print("0 uses all cores.")
+                            newThreads = str(input("Enter new threads value: "))
+                            if newThreads.isdigit():
+                                service.set_ini(section, "threads", newThreads)
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 12:
+                            section = "Analyze"
+                            print("1 = exact, every metric is computed exactly")
+                            print("2 = approximate, sampling estimators with error bounds,")
+                            print("    for graphs with millions of edges")
+                            print("The error bound is set by epsilon, the nodes sampled by samples.")
+                            newPrecision = str(input("Enter new precision: "))
+                            if newPrecision == "1":
+                                service.set_ini(section, "precision", "exact")
+                            elif newPrecision == "2":
+                                service.set_ini(section, "precision", "approximate")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 13:
+                            section = "Analyze"
+                            setting = "cache"
+                            print("Boolean, 1 = True, 0 = False")
+                            print("Should the results of earlier analyses be reused if the")
+                            print("dataset and the settings they depend on did not change?")
+                            newBool = str(
+                                input("Enter new " + setting + " setting: "))
+                            if newBool.isdigit():
+                                if int(newBool) == 0:
+                                    service.set_ini(
+                                        section, setting, "False")
+                                elif int(newBool) == 1:
+                                    service.set_ini(
+                                        section, setting, "True")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 14:
+                            section = "Analyze"
+                            print("Positive integer, minimum vaule = 0")
+                            print("processes running the independent stages of the analysis,")
+                            print("0 uses one per core, 1 runs them one after the other.")
+                            newWorkers = str(input("Enter new workers value: "))
+                            if newWorkers.isdigit():
+                                service.set_ini(section, "workers", newWorkers)
+                            else:
+                                print("Invalid selection!")
+
+                        elif userSelection == 15:
+                            section = "Analyze"
+                            setting = "extra_metrics"
+                            print("Boolean, 1 = True, 0 = False")
+                            print("Should effective diameter, betweenness and closeness also be")
+                            print("computed with exact precision? They take O(nodes * edges).")
+                            newBool = str(
+                                input("Enter new " + setting + " setting: "))
+                            if newBool.isdigit():
+                                if int(newBool) == 0:
+                                    service.set_ini(
+                                        section, setting, "False")
+                                elif int(newBool) == 1:
+                                    service.set_ini(
+                                        section, setting, "True")
+                                else:
+                                    print("Invalid selection!")
+                            else:
+                                print("Invalid selection!")
+
                 elif userSelection == 7:
                     print("\033[H\033[2J", end="")
                     print("7 - Analyzing scraped Dataset")
@@ -770,35 +1012,25 @@ def main(argv):
                             file.split("/")[1:2][0] for idx, file in enumerate(dbfiles)]
                     print(*dblist, sep='\n')
                     validInput = False
+                    seed_names = []
                     userInput = input(
-                        "Enter number of first Dataset you want to merge: ")
-                    if userInput.isdigit():
-                        userSelectionDb = int(userInput) - 1
-                        if userSelectionDb >= 0 and userSelectionDb < (len(dbfiles)):
-                            dbfile1 = str(dbfiles[userSelectionDb])
-                            db_name1 = dbfile1.split("/")[2:3][0]
-                            seed_name1 = db_name1[:len(db_name1)-14]
-                            validInput = True
-                    
-                    if validInput:
-                        userInput = input(
-                            "Enter number of second Dataset you want to merge: ")
-                        if userInput.isdigit():
-                            userSelectionDb = int(userInput) - 1
+                        "Enter numbers of the Datasets you want to merge, separated by spaces: ")
+                    for number in userInput.split():
+                        if number.isdigit():
+                            userSelectionDb = int(number) - 1
                             if userSelectionDb >= 0 and userSelectionDb < (len(dbfiles)):
-                                dbfile2 = str(dbfiles[userSelectionDb])
-                                db_name2 = dbfile2.split("/")[2:3][0]
-                                seed_name2 = db_name2[:len(db_name2)-14]
+                                db_name = str(dbfiles[userSelectionDb]).split("/")[2:3][0]
+                                if db_name[:len(db_name)-14] not in seed_names:
+                                    seed_names.append(db_name[:len(db_name)-14])
                                 validInput = True
-                            else:
-                                validInput = False
-                        else:
-                            validInput = False
-                    
-                    if dbfile1 == dbfile2:
-                        print("Please choose two different datasets!")
+                                continue
                         validInput = False
-                        
+                        break
+
+                    if validInput and len(seed_names) < 2:
+                        print("Please choose at least two different datasets!")
+                        validInput = False
+
                     if validInput:
                         userInput = str(input(
                             "Enter name of new merged Dataset (2 - 32 Characters): "))
@@ -815,12 +1047,13 @@ def main(argv):
                             
                     if validInput:
                         print("Please verify that the following Datasets should be merged:")
-                        print("Dataset 1 : " + seed_name1)
-                        print("Dataset 2 : " + seed_name2)
+                        for idx, seed_name in enumerate(seed_names):
+                            print("Dataset " + str(idx + 1) + " : " + seed_name)
                         print("New merged Dataset: " + newName)
+                        print("Conflicts: " + service.iniValues.merge_conflicts)
                         cont = input("Enter (y/n): ") 
                         if cont == 'y':
-                            service.merge(seed_name1, seed_name2, newName)
+                            service.merge(seed_names, newName)
                         else:
                             print("No confirmation received, so no change to folders!")
                     else:
@@ -876,6 +1109,33 @@ def main(argv):
                     else:
                         print("No confirmation received, so no change to folders!")
 
+                elif userSelection == 11:
+                    print("\033[H\033[2J", end="")
+                    print("11 - Refreshing scraped Dataset")
+                    print("Only messages newer than the last scrape are requested.")
+                    print(
+                        "Scrape Databases for the following seeds were found in the data directory:")
+                    dbfiles = glob('data/*/*_scrape.sqlite')
+                    dbfiles.sort(key=str.lower)
+                    dblist = ["--> " +
+                            str(idx + 1) +
+                            ": " +
+                            file.split("/")[1:2][0] for idx, file in enumerate(dbfiles)]
+                    print(*dblist, sep='\n')
+                    userInput = input(
+                        "Enter number of Database you want to refresh: ")
+                    if userInput.isdigit():
+                        userSelectionDb = int(userInput) - 1
+                        if userSelectionDb >= 0 and userSelectionDb < (len(dbfiles)):
+                            dbfile = dbfiles[userSelectionDb]
+                            db_name = dbfile.split("/")[2:3][0]
+                            seed_name = db_name[:len(db_name)-14]
+                            service.refresh(seed_name)
+                        else:
+                            print("Invalid selection!")
+                    else:
+                        print("Invalid selection!")
+
                 elif userSelection == 0:
                     sys.exit(0)
 
@@ -0,0 +1,774 @@
+#!/usr/bin/python3
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table
+from reportlab.rl_config import defaultPageSize
+from scraper_cache import AnalysisCache
+from scraper_graph import KIND_SETTINGS, SeedGraph, selected_kinds
+from scraper_stages import Stage, StageRunner
+from tabulate import tabulate
+
+
+def estimate(value, error=None, digits=6):
+    # a value, with its error bound if it was estimated
+    text = str(round(value, digits))
+    if error is not None:
+        text += " ± " + str(round(error, digits))
+    return text
+
+
+def network(graph, threads, directed=False):
+    # networkit graph of a SeedGraph, using threads threads, 0 for all
+    import networkit as nk
+    if threads > 0:
+        nk.setNumberOfThreads(threads)
+    return graph.networkit(directed)
+
+
+def extended(metrics, extra_metrics):
+    # effective diameter, betweenness and closeness are estimated in
+    # approximate mode, exact ones take O(n*m) and only with extra_metrics
+    return metrics.approximate or extra_metrics
+
+
+def connectedness(graph, precision, epsilon, samples, threads,
+                  extra_metrics=False):
+    from scraper_metrics import GraphMetrics
+
+    metrics = GraphMetrics(network(graph, threads), precision, epsilon,
+                           samples)
+    connected, component = metrics.components()
+    return {
+        'connected': connected,
+        'nodes': component.numberOfNodes(),
+        'edges': component.numberOfEdges(),
+        'diameter': metrics.diameter(),
+        'effective': metrics.effective_diameter()
+        if extended(metrics, extra_metrics) else None,
+        'transitivity': metrics.transitivity(),
+        'precision': metrics.precision,
+    }
+
+
+def centrality(graph, precision, epsilon, samples, threads,
+               extra_metrics=False):
+    from scraper_metrics import GraphMetrics
+
+    metrics = GraphMetrics(network(graph, threads), precision, epsilon,
+                           samples)
+    result = {
+        'pagerank': metrics.pagerank(network(graph, threads, True)),
+        'betweenness': [],
+        'closeness': [],
+        'confidence': metrics.confidence,
+    }
+    if extended(metrics, extra_metrics):
+        metrics.components()
+        result['betweenness'] = metrics.betweenness()
+        result['closeness'] = metrics.closeness()
+    return result
+
+
+def degree_ranking(graph):
+    # (degree of every node, nodes sorted by degree)
+    degrees = graph.degrees()
+    return degrees, np.argsort(-degrees, kind='stable').tolist()
+
+
+def degree_distribution(graph):
+    # distinct neighbors of every node, highest first
+    return sorted(graph.neighbors().astype(float).tolist(), reverse=True)
+
+
+def power_law(graph):
+    # (alpha, R, p) of the power law fit of the degree distribution
+    import powerlaw
+
+    fit = powerlaw.Fit(degree_distribution(graph))
+    R, p = fit.distribution_compare('power_law', 'exponential')
+    return fit.alpha, R, p
+
+
+def communities(graph, threads):
+    # PLM community of every node and the modularity of the partition
+    import networkit as nk
+
+    nkG = network(graph, threads)
+    partition = nk.community.detectCommunities(
+        nkG,
+        algo=nk.community.PLM(nkG, True),
+        inspect=False)
+    partition.compact()
+    return {
+        'membership': partition.getVector(),
+        'modularity': nk.community.Modularity().getQuality(partition, nkG),
+    }
+
+
+def spring_layout(graph):
+    # {node: (x, y)} of a networkx graph
+    import networkx as nx
+
+    return dict((node, tuple(float(x) for x in xy))
+                for node, xy in nx.spring_layout(graph).items())
+
+
+def graph_layout(graph, show_hops):
+    # layout of the directed graph of the edges up to show_hops
+    return spring_layout(graph.networkx(directed=True, max_hop=show_hops))
+
+
+def community_layouts(graph, result, number):
+    # [(community, layout)] of the number largest communities
+    membership = np.array(result['membership'])
+    sizes = np.bincount(membership)
+    top_comm_list = np.argsort(-sizes, kind='stable')[
+        :min(number, int(np.count_nonzero(sizes)))].tolist()
+    return [(comm, spring_layout(graph.networkx(
+        nodes=np.flatnonzero(membership == comm).tolist())))
+        for comm in top_comm_list]
+
+
+def pyplot():
+    # plots are only saved to files, in worker processes too
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def node_colors(graph, colors):
+    # color of every node of a networkx graph, colors has one per type
+    return [colors.get(data["type"], colors['none'])
+            for node, data in graph.nodes(data=True)]
+
+
+def short_labels(graph):
+    # labels of the nodes to draw, shortened to 50 characters
+    labels = {}
+    for node, data in graph.nodes(data=True):
+        if len(data["label"]) > 50:
+            labels[node] = data["label"][:50] + "..."
+        else:
+            labels[node] = data["label"]
+    return labels
+
+
+def draw(graph, pos, colors, file):
+    import networkx as nx
+
+    plt = pyplot()
+    options = {
+        "font_size": 10,
+        "node_color": node_colors(graph, colors),
+        "labels": short_labels(graph),
+        "with_labels": True,
+    }
+    nx.draw(graph, pos=pos, **options)
+    plt.savefig(file)
+    plt.close(plt.gcf())
+
+
+def log_plot(values, xlabel, ylabel, file):
+    plt = pyplot()
+    plt.xscale("log")
+    plt.xlabel(xlabel)
+    plt.yscale("log")
+    plt.ylabel(ylabel)
+    plt.plot(values)
+    plt.savefig(file)
+    plt.close(plt.gcf())
+    return file
+
+
+def degree_plot(graph, file):
+    return log_plot(degree_distribution(graph), "degree", "number of nodes",
+                    file)
+
+
+def graph_plot(graph, pos, show_hops, colors, file):
+    # spring based plot of the edges up to show_hops
+    draw(graph.networkx(directed=True, max_hop=show_hops), pos, colors, file)
+    return file
+
+
+def community_plots(graph, result, layouts, colors, prefix):
+    # [(community, file, nodes, edges)] of the plotted communities
+    membership = np.array(result['membership'])
+    plots = []
+    for comm, pos in layouts:
+        G_community = graph.networkx(
+            nodes=np.flatnonzero(membership == comm).tolist())
+        file = prefix + str(comm) + ".png"
+        draw(G_community, pos, colors, file)
+        plots.append((comm, file, G_community.number_of_nodes(),
+                      G_community.number_of_edges()))
+    return plots
+
+
+def community_size_plot(result, file):
+    sizes = np.bincount(np.array(result['membership']))
+    return log_plot(sorted(sizes[sizes > 0].tolist(), reverse=True),
+                    "community id", "size", file)
+
+
+def export_gml(graph, connection, file):
+    # edges are streamed from the database again for their attributes
+    graph.connection = connection
+    graph.write_gml(file)
+    return file
+
+
+def sockpuppets(file):
+    # table of senders and the sender predicted by a SOM trained on the
+    # words of their messages, reads the database file itself to run in a
+    # worker process
+    from nltk.stem import PorterStemmer
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn_som.som import SOM
+
+    dataset = []
+    connection = sqlite3.connect(file)
+    for sender_id, msg in connection.execute(
+            'SELECT sender_id, raw_text FROM t_messages;'):
+        # only use Messages that contain some text
+        if msg:
+            if len(msg) > 5:
+                # use only words without special characters
+                words = []
+                for word in msg.split():
+                    if not re.search("\\W+", word) and len(word) > 1:
+                        words.append(word)
+                dataset.append([sender_id, words])
+    connection.close()
+    dataset.sort()
+
+    # select unique list of senders
+    sender_set = set()
+    for entry in dataset:
+        sender_set.add(entry[0])
+    sender_list = list(sender_set)
+    sender_list.sort()
+
+    # aggregate words by sender
+    aggr_dataset = []
+    for sender in sender_list:
+        aggr_entry = [sender,[]]
+        for entry in dataset:
+            if entry[0] == sender:
+                for word in entry[1]:
+                    if not word in aggr_entry[1]:
+                        aggr_entry[1].append(word)
+        if len(aggr_entry[1]) > 0: 
+            aggr_dataset.append(aggr_entry)
+
+    # stemming
+    stemmer = PorterStemmer()
+    stemmed = [[stemmer.stem(word) for word in entry[1]]
+               for entry in aggr_dataset]
+    stemmed_concat = [' '.join(words) for words in stemmed]
+
+    # vectorize using bag of words - bow
+    vectorizer = CountVectorizer()
+    bow = vectorizer.fit_transform(stemmed_concat)
+
+    # generate and train SOM
+    msg_som = SOM(m=len(aggr_dataset), n=1, dim=bow.get_shape()[
+                  1], random_state=470151198)
+    msg_som.fit(bow.toarray())
+
+    # make predictions for sender
+    predictions = msg_som.predict(bow.toarray())
+    table_data = [["Sender", "Predicted Sender"]]
+    for entry in aggr_dataset:
+        table_data.append([entry[0], aggr_dataset[predictions[aggr_dataset.index(entry)]][0]])
+    return table_data
+
+
+class Analyzer():
+    """Writes the graph analysis and PDF report of a scraped seed.
+
+    The graph is loaded into the arrays of a SeedGraph and every metric is
+    computed by networkit, networkx graphs are only built from it to draw
+    the plots. networkit, numpy and reportlab are needed for every report,
+    networkx, matplotlib, powerlaw and the sockpuppet libraries (nltk,
+    sklearn, sklearn_som) are only imported when the report section using
+    them is enabled in the [Analyze] section of scraper.ini.
+
+    Every section is a Stage computed by one of the functions above, the
+    StageRunner runs independent stages at the same time in worker
+    processes and the PDF is assembled from their results in a fixed order.
+    The graph, metrics, communities, layouts, power law fit and sockpuppet
+    table are kept in the AnalysisCache of the seed, plots and the PDF are
+    always made anew.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.iniValues = service.iniValues
+
+    def analyze(self, seed):
+
+        # Analyze
+        data_dir = os.path.join("data", seed)
+
+        def write_text(story, styles, string):
+            story.append(Paragraph(string, styles["Normal"]))
+            story.append(Spacer(0, 0.5*cm))
+
+        def write_table(story, styles, data, title):
+            story.append(Paragraph("<b>" + title + "</b>", styles['Heading4']))
+            story.append(Table(
+                data,
+                style=[('GRID', (0, 0), (-1, -1), 1, '#000000F')],
+                hAlign='LEFT',
+                spaceBefore=0.3*cm,
+                spaceAfter=0.3*cm))
+
+        def write_img(story, styles, file, width, height, title):
+            story.append(Paragraph("<b>" + title +
+                         "</b>", styles['Heading4'],))
+            story.append(Spacer(0, 0.3*cm))
+            story.append(Image(file, width, height, hAlign='CENTER'))
+
+        def save_doc(story):
+            # initialize pdfreport document
+            PAGE_HEIGHT = defaultPageSize[1]
+            PAGE_WIDTH = defaultPageSize[0]
+
+            Title = "Telegram scraping report, seed:" + seed
+            pageinfo = "Seed: " + seed
+
+            def myFirstPage(canvas, doc):
+                canvas.saveState()
+                canvas.setFont('Times-Bold', 16)
+                canvas.drawCentredString(PAGE_WIDTH/2.0, PAGE_HEIGHT-50, Title)
+                canvas.setFont('Times-Roman', 11)
+                canvas.drawString(2.5*cm, 1*cm, "First Page / %s" % pageinfo)
+                canvas.restoreState()
+
+            def myLaterPages(canvas, doc):
+                canvas.saveState()
+                canvas.setFont('Times-Roman', 11)
+                canvas.drawString(2.5*cm, 1*cm, "Page %d %s" %
+                                  (doc.page, pageinfo))
+                canvas.restoreState()
+
+            doc = SimpleDocTemplate(
+                os.path.join(data_dir, seed + ".pdf"),
+                title=Title,
+                author=self.iniValues.examiner,
+                pagesize=defaultPageSize,
+                rightMargin=72,
+                leftMargin=72,
+                topMargin=76,
+                bottomMargin=35
+            )
+
+            # save document
+            doc.build(story, onFirstPage=myFirstPage,
+                      onLaterPages=myLaterPages)
+
+        print("Analyzing " + seed)
+        print("The resulting files will be available in the " + data_dir + " Folder")
+
+        db = self.service.open_db(seed)
+        connection = db._adapter.connection
+
+        # get scraping statistics
+        min_date = db.t_ids.last_check.min()
+        first_scrape = db().select(min_date).first()[min_date]
+        max_date = db.t_ids.last_check.max()
+        last_scrape = db().select(max_date).first()[max_date]
+
+        # initialize document styles
+        styles = getSampleStyleSheet()
+        story = []
+
+        # write scraping statistics to doc
+        paragraph = \
+            "Database: " + seed + "_scrape.sqlite" + "<br></br>" +  \
+            "Scraped from <br></br>" + \
+            str(first_scrape) + "<br></br>" + \
+            " -- to -- <br></br>" + \
+            str(last_scrape) + "<br></br>" + \
+            "by " + self.iniValues.examiner
+
+        write_text(story, styles, paragraph)
+
+        table_data = [["Users", str(db(db.t_contacts.is_bot == False).count())],
+                      ["Bots", str(db(db.t_contacts.is_bot == True).count())],
+                      ["Chats", str(
+                          db(db.t_chats.chat_type == "chat").count())],
+                      ["Channels", str(
+                          db(db.t_chats.chat_type == "channel").count())],
+                      ["Messages", str(db(db.t_messages).count())],
+                      ["URLs", str(db(db.o_urls).count())]]
+
+        write_table(story, styles, table_data, "Scraped Objects")
+
+        # keyword hits recorded while scraping, databases scraped before
+        # keyword_hits existed only have the keyword mentions
+        if self.iniValues.keys and 'keyword_hits' in db.tables:
+            table_data = [["Keyword", "Hits", "Messages"]]
+            for keyword, hits, messages in db.executesql(
+                    "SELECT keyword, COUNT(*), "
+                    "COUNT(DISTINCT entity_id || '/' || message_id) "
+                    "FROM keyword_hits GROUP BY keyword ORDER BY COUNT(*) DESC;"):
+                table_data.append([keyword, str(hits), str(messages)])
+            if len(table_data) > 1:
+                write_table(story, styles, table_data, "Keyword Hits")
+
+        # the sections of the report are stages run by a pool of
+        # Analyze -> workers processes as soon as the stages they need are
+        # done, results of earlier runs are reused if the tables they were
+        # computed from and their settings did not change
+        cache = AnalysisCache(data_dir, connection, self.iniValues.analysis_cache)
+        kinds = selected_kinds(self.iniValues)
+        graph_key = cache.key(['nodes', 'edges'], kinds)
+        metrics_key = cache.key([], graph_key, self.iniValues.precision,
+                                self.iniValues.epsilon, self.iniValues.samples,
+                                self.iniValues.extra_metrics)
+        # all metrics on a networkit graph built from the arrays, weighted by
+        # the number of mentions, parallel algorithms use Analyze -> threads
+        # threads, Analyze -> precision selects exact metrics or estimates
+        # with error bounds
+        settings = (self.iniValues.precision, self.iniValues.epsilon,
+                    self.iniValues.samples, self.iniValues.threads,
+                    self.iniValues.extra_metrics)
+        colors = dict((kind, getattr(self.iniValues, 'color_' + kind))
+                      for setting, kind in KIND_SETTINGS)
+        colors['none'] = self.iniValues.color_none
+        gml_file = os.path.join(data_dir, seed + ".gml")
+
+        with StageRunner(cache, self.iniValues.workers) as runner:
+            # the SOM only needs the messages, it starts with the graph
+            if self.iniValues.sockpuppets:
+                runner.add(Stage(
+                    'sockpuppets', sockpuppets,
+                    args=(os.path.join(data_dir, seed + "_scrape.sqlite"),),
+                    key=cache.key(['t_messages'])))
+            # load the graph, only the kinds of nodes selected in [Analyze]
+            runner.add(Stage('graph', SeedGraph, args=(connection, kinds, seed),
+                             key=graph_key, local=True))
+            graph = runner.run(['graph'])['graph']
+            print("Graph : " + seed)
+
+            # Display Statistics
+            nodes = str(graph.number_of_nodes())
+            edges = str(graph.number_of_edges())
+            print("Nodes: " + nodes)
+            print("Edges: " + edges)
+
+            if graph.number_of_nodes() == 0:
+                print("The graph contains no data, canceling analyis!")
+            else:
+                runner.add(
+                    Stage('connectedness', connectedness, settings,
+                          ['graph'], metrics_key),
+                    Stage('degrees', degree_ranking, (), ['graph'], local=True),
+                    Stage('centrality', centrality, settings, ['graph'],
+                          metrics_key),
+                    Stage('communities', communities,
+                          (self.iniValues.threads,), ['graph'], graph_key))
+                if self.iniValues.powerlaw:
+                    runner.add(Stage('powerlaw', power_law, (), ['graph'],
+                                     graph_key))
+                if self.iniValues.plots:
+                    # layouts are kept, colors and labels are drawn anew
+                    runner.add(
+                        Stage('degree_plot', degree_plot,
+                              (os.path.join(data_dir, seed + "_degree_dist.png"),),
+                              ['graph']),
+                        Stage('layout', graph_layout,
+                              (self.iniValues.show_hops,), ['graph'],
+                              cache.key([], graph_key, self.iniValues.show_hops)),
+                        Stage('graph_plot', graph_plot,
+                              (self.iniValues.show_hops, colors,
+                               os.path.join(data_dir, seed + ".png")),
+                              ['graph', 'layout']),
+                        Stage('community_sizes', community_size_plot,
+                              (os.path.join(data_dir, seed + "_communitysize.png"),),
+                              ['communities']))
+                    if self.iniValues.num_communities > 0:
+                        runner.add(
+                            Stage('community_layouts', community_layouts,
+                                  (self.iniValues.num_communities,),
+                                  ['graph', 'communities'],
+                                  cache.key([], graph_key,
+                                            self.iniValues.num_communities)),
+                            Stage('community_plots', community_plots,
+                                  (colors, os.path.join(data_dir, seed + "_comm_")),
+                                  ['graph', 'communities', 'community_layouts']))
+                # export gml, unless the one of the same graph is there
+                gml_current = os.path.exists(gml_file) and \
+                    cache.get('gml', graph_key) is not cache.missing
+                if not gml_current:
+                    runner.add(Stage('gml', export_gml, (connection, gml_file),
+                                     ['graph'], local=True))
+                results = runner.run()
+                if not gml_current:
+                    cache.put('gml', graph_key, True)
+
+                # the report is assembled from the results in a fixed order
+                density = str(round(graph.density(), 6))
+                print("Network density:", density)
+
+                # write graph statistics to doc
+                table_data = [["Nodes", nodes],
+                              ["Edges", edges],
+                              ["Density", density]]
+
+                write_table(story, styles, table_data, "Graph: " + seed)
+
+                print("Precision: " + self.iniValues.precision)
+                result = results['connectedness']
+                print("Is Connected: " + str(result['connected']))
+                if not result['connected']:
+                    print("Largest Component:")
+                    print("    Nodes: " + str(result['nodes']))
+                    print("    Edges: " + str(result['edges']))
+                lower, upper = result['diameter']
+                diameter = str(lower) if lower == upper \
+                    else str(lower) + " - " + str(upper)
+                effective = None
+                if result['effective'] is not None:
+                    effective, error = result['effective']
+                    effective = str(round(effective, 2))
+                    if error is not None:
+                        effective += " (pairs ± " + str(round(error * 100, 1)) + "%)"
+                transitivity = estimate(*result['transitivity'])
+
+                # write connection statistics to doc
+                if result['connected']:
+                    table_data = [["is Connected", "True"],
+                                  ["Diameter", diameter]]
+                    if effective is not None:
+                        table_data.append(["Effective Diameter (90%)", effective])
+                    table_data.append(["Transitivity", transitivity])
+                else:
+                    table_data = [["is Connected", "False"],
+                                  ["Largest Component:", ""],
+                                  ["--> Nodes", str(result['nodes'])],
+                                  ["--> Edges", str(result['edges'])],
+                                  ["--> Diameter", diameter]]
+                    if effective is not None:
+                        table_data.append(["--> Effective Diameter (90%)", effective])
+                    table_data.append(["--> Transitivity", transitivity])
+                table_data.append(["Precision", result['precision']])
+
+                write_table(story, styles, table_data, "Connectednes")
+
+                print("Diameter:", diameter)
+                if effective is not None:
+                    print("Effective Diameter (90%):", effective)
+                print("Transitivity:", transitivity)
+
+                degrees, sorted_degree = results['degrees']
+
+                # create
+                paragraph = \
+                    "<br></br>" + \
+                    "<br></br>" + \
+                    "<h2>Lists of the different entities, sortet by degree:</h2>"
+                write_text(story, styles, paragraph)
+
+                # nodes of each occuring type
+                for mytype in sorted(set(graph.types)):
+                    top = []
+                    # add 20 nodes with the highest degree
+                    for node in sorted_degree:
+                        # list only nodes with a degree > 1
+                        if degrees[node] <= 1:
+                            break
+                        if graph.types[node] == mytype:
+                            top.append(node)
+                            if len(top) >= 20:
+                                break
+
+                    # create table
+                    table_data = [["Node", "Edges"]]
+                    if len(top) > 0:
+                        for node in top:
+                            label = graph.labels[node]
+                            if len(label) > 70:
+                                label = label[:70] + "..."
+                            table_data.append([label, int(degrees[node])])
+                        print("Top 20 " + mytype + " by degree:")
+                        print(tabulate(
+                            table_data,
+                            headers='firstrow',
+                            tablefmt='fancy_grid',
+                            maxcolwidths=[80, None])
+                        )
+                        write_table(story,
+                                    styles,
+                                    table_data,
+                                    "Top 20 " + mytype + " by degree")
+
+                # Degree distribution
+                if self.iniValues.plots:
+                    write_img(story,
+                              styles,
+                              results['degree_plot'],
+                              10*cm,
+                              10*cm,
+                              "Plot of degree distribution")
+
+                # Test if degree distribution follows a power law
+                if self.iniValues.powerlaw:
+                    alpha, R, p = results['powerlaw']
+
+                    paragraph = \
+                        "The degree distribution on this graph has a coefficient of <br></br>" + \
+                        "alpha = " + str(round(alpha, 4)) + "<br></br>" + \
+                        "if above 4, then the Graph has a long tail distribution<br></br>" \
+                        "R = " + str(round(R, 4)) + "<br></br>" + \
+                        "Likelihood ratio, if positive, the power law distribution is more likely than a exponential distribution.<br></br>" + \
+                        "p = " + str(round(p, 4)) + "<br></br>" + \
+                        "Significance of the sign of R, if below .05 the sign of R is taken to be significant."
+                    write_text(story, styles, paragraph)
+
+                    print("alpha = " + str(round(alpha, 6)))
+                    print("R = " + str(round(R, 6)))
+                    print("p = " + str(round(p, 6)))
+
+                # PageRank of the directed graph, betweenness and closeness
+                # centrality of the largest component
+                result = results['centrality']
+
+                # create table
+                table_data = [["Node", "Centrality"]]
+                for node in result['pagerank']:
+                    table_data.append([graph.labels[node[0]][0:80],
+                                       str(round(node[1], 8))])
+
+                write_table(story, styles, table_data,
+                            "Top 20 nodes by Page Rank centrality")
+                print("Top 20 nodes by Page Rank centrality")
+                print(tabulate(
+                    table_data,
+                    headers='firstrow',
+                    tablefmt='fancy_grid',
+                    maxcolwidths=[80, None])
+                )
+
+                for title in ["betweenness", "closeness"]:
+                    # only estimated, or with Analyze -> extra_metrics
+                    if not result[title]:
+                        continue
+                    table_data = [["Node", "Centrality"]]
+                    for node, score, error in result[title]:
+                        table_data.append([graph.labels[node][0:80],
+                                           estimate(score, error, 8)])
+                        if error is not None:
+                            table_data[0][1] = "Centrality (" + str(
+                                int(result['confidence'] * 100)) + "% confidence)"
+                    write_table(story, styles, table_data,
+                                "Top 10 nodes by " + title + " centrality")
+                    print("Top 10 nodes by " + title + " centrality")
+                    print(tabulate(
+                        table_data,
+                        headers='firstrow',
+                        tablefmt='fancy_grid',
+                        maxcolwidths=[80, None])
+                    )
+
+                # plot Graph
+                if self.iniValues.plots:
+                    write_img(story,
+                              styles,
+                              results['graph_plot'],
+                              17*cm,
+                              17*cm,
+                              "Plot of spring based graph, " + str(self.iniValues.show_hops) + " hops")
+
+                # detected communitites, community of every node
+                result = results['communities']
+                membership = np.array(result['membership'])
+                sizes = np.bincount(membership)
+
+                # inspect resulting partition
+                comm_count = len(membership)
+                comm_subsets = int(np.count_nonzero(sizes))
+                comm_max = int(sizes.max())
+                comm_min = int(sizes[sizes > 0].min())
+                modularity = result['modularity']
+
+                paragraph = \
+                    "<br></br>" + \
+                    "Community detection: <br></br>" + \
+                    "PLM algorithm detected " + str(comm_count) + " elements<br></br>" + \
+                    "assigned to " + str(comm_subsets) + " communities<br></br>" + \
+                    "ranging from " + str(comm_max) + " to " + str(comm_min) + " nodes<br></br>" + \
+                    "with " + str(round(modularity, 6)) + \
+                    " modularity.<br></br>"
+                write_text(story, styles, paragraph)
+
+                if self.iniValues.plots and self.iniValues.num_communities > 0:
+                    paragraph = \
+                        "<br></br>" + \
+                        "<h2>" + str(self.iniValues.num_communities) + \
+                        " plots of the largest detected Communities: </h2>"
+                    write_text(story, styles, paragraph)
+
+                    for comm, plotfile, comm_nodes, comm_edges in \
+                            results['community_plots']:
+                        write_img(story,
+                                  styles,
+                                  plotfile,
+                                  7*cm,
+                                  7*cm,
+                                  "Plot of community " + str(comm))
+
+                        # create
+                        paragraph = \
+                            "Community " + str(comm) + ": " + \
+                            str(comm_nodes) + " nodes " + str(comm_edges) + " edges"
+                        write_text(story, styles, paragraph)
+
+                if self.iniValues.plots:
+                    write_img(story,
+                              styles,
+                              results['community_sizes'],
+                              7*cm,
+                              7*cm,
+                              "Plot of community size distribution")
+
+                # sockpuppet detection
+                if self.iniValues.sockpuppets:
+                    table_data = results['sockpuppets']
+
+                    write_table(story, styles, table_data,
+                                "Predicted Sender (Beta, not yet functional!)")
+                    print("Predicted Sender (Beta, not yet functional!)")
+                    print(tabulate(
+                        table_data,
+                        headers='firstrow',
+                        tablefmt='fancy_grid',
+                        maxcolwidths=[None, None])
+                    )
+
+                # closing
+                paragraph = \
+                    "<br></br>" + \
+                    "A copy of the graph data was saved as " + \
+                    gml_file + "<br></br>" + \
+                    "Which can be imported by most network analysis tools, like for example Gephi."
+                write_text(story, styles, paragraph)
+
+                # save document
+                save_doc(story)
+
+                print("A report of this analysis was saved as " +
+                      os.path.join(data_dir, seed + ".pdf"))
+
+        print("Analysis stages:")
+        print(tabulate(runner.timings(), headers='firstrow', tablefmt='fancy_grid'))
+        print(cache.stats())
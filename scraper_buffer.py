@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+from datetime import datetime
+from scraper_cache import NodeRegistry
+from scraper_db import node_key
+from scraper_model import ScrapeError
+
+
+def sql_datetime(value):
+    # same text representation pydal uses for datetime fields
+    if isinstance(value, datetime):
+        return value.isoformat(' ')[:19]
+    return value
+
+
+class WriteBuffer():
+    """Collects the rows written while processing messages.
+
+    Messages, the nodes and edges of mentions, keyword hits, new URLs and the
+    msg_count and message id watermark updates of t_ids are kept in memory
+    and written with executemany in one transaction as soon as batch_size
+    messages are waiting, or when flush() is called. The short URLs
+    finished by the shortener in the meantime are written with the same
+    transaction. If it fails, everything stays buffered for the next flush().
+    """
+
+    def __init__(self, db, batch_size, shortener=None):
+        self.db = db
+        self.batch_size = max(batch_size, 1)
+        self.shortener = shortener
+        self.nodes = NodeRegistry(db)
+        self.messages = []
+        self.edges = []
+        self.hits = []
+        self.urls = []
+        self.shorts = []
+        self.counts = {}
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add_message(self, entity_id, message_id, sender_id, raw_text,
+                    web_preview_url, time):
+        self.messages.append((entity_id,
+                              message_id,
+                              sender_id,
+                              raw_text,
+                              web_preview_url,
+                              sql_datetime(time)))
+        if entity_id in self.counts:
+            count, low, high = self.counts[entity_id]
+            self.counts[entity_id] = (count + 1,
+                                      min(low, message_id),
+                                      max(high, message_id))
+        else:
+            self.counts[entity_id] = (1, message_id, message_id)
+        if len(self.messages) >= self.batch_size:
+            self.flush()
+
+    def add_mention(self, source, content, c_type, message_id, timestamp, hop):
+        # an edge from the sender to the mentioned node, the types and
+        # names of the nodes are set by update_nodes after scraping
+        if c_type == 't_id':
+            c_type = 'telegram_id'
+        self.edges.append((
+            self.nodes.get('telegram_id', node_key('telegram_id', source),
+                           str(source)),
+            self.nodes.get(c_type, node_key(c_type, content), str(content)),
+            message_id,
+            timestamp.timestamp() if isinstance(timestamp, datetime) else None,
+            hop))
+
+    def add_keyword_hit(self, entity_id, message_id, keyword, start, end):
+        self.hits.append((entity_id, message_id, keyword, start, end))
+
+    def add_url(self, url, short):
+        self.urls.append((url, short))
+
+    def set_short(self, url, short):
+        self.shorts.append((short, url))
+
+    def flush(self, wait=False):
+        if self.shortener:
+            self.shorts.extend(self.shortener.results(wait))
+        if not self.messages and not self.edges and not self.counts \
+                and not self.urls and not self.shorts:
+            return
+        now = sql_datetime(datetime.now())
+        connection = self.db._adapter.connection
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO t_messages "
+                "(entity_id, message_id, sender_id, raw_text, web_preview_url, time) "
+                "VALUES (?, ?, ?, ?, ?, ?);",
+                self.messages)
+            connection.executemany(
+                "INSERT INTO nodes (id, kind, key, label) VALUES (?, ?, ?, ?);",
+                self.nodes.new)
+            connection.executemany(
+                "INSERT INTO edges (source, target, message_id, timestamp, hop) "
+                "VALUES (?, ?, ?, ?, ?);",
+                self.edges)
+            connection.executemany(
+                "INSERT INTO keyword_hits "
+                "(entity_id, message_id, keyword, start_pos, end_pos) "
+                "VALUES (?, ?, ?, ?, ?);",
+                self.hits)
+            connection.executemany(
+                "INSERT OR IGNORE INTO o_urls (url, short) VALUES (?, ?);",
+                self.urls)
+            connection.executemany(
+                "UPDATE o_urls SET short = ? WHERE url = ?;",
+                self.shorts)
+            connection.executemany(
+                "UPDATE t_ids SET msg_count = msg_count + ?, "
+                "min_msg_id = MIN(COALESCE(min_msg_id, ?), ?), "
+                "max_msg_id = MAX(COALESCE(max_msg_id, ?), ?), "
+                "scrape_state = 'Scraping', last_check = ? WHERE t_id = ?;",
+                [(count, low, low, high, high, now, t_id)
+                 for t_id, (count, low, high) in self.counts.items()])
+            self.db.commit()
+
+        except Exception as e:
+            # the rows stay buffered, the next flush writes them again
+            self.db.rollback()
+            raise ScrapeError('Error writing ' + str(len(self.messages)) +
+                              ' buffered messages: ' + str(e))
+
+        self.nodes.written()
+        self.messages = []
+        self.edges = []
+        self.hits = []
+        self.urls = []
+        self.shorts = []
+        self.counts = {}
@@ -0,0 +1,347 @@
+#!/usr/bin/python3
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import time
+
+
+class IdRegistry():
+    """In-memory copy of the t_ids table for fast lookups while scraping.
+
+    Maps every known Telegram ID to the session that resolved it and its
+    type. Session and type are packed into one small integer, which Python
+    shares between all entries, so a million IDs need roughly 100 MB.
+    """
+    type_bits = 3
+
+    def __init__(self, db=None):
+        self.ids = {}
+        self.session_names = []
+        self.type_names = ['contact', 'chat', 'channel', 'unknown']
+        if db:
+            self.load(db)
+
+    def load(self, db):
+        for t_id, t_session_name, t_type in db.executesql(
+                'SELECT t_id, t_session_name, t_type FROM t_ids;'):
+            self.add(t_id, t_session_name, t_type)
+
+    def code(self, names, name, limit):
+        if name not in names:
+            if len(names) >= limit:
+                raise ValueError('IdRegistry can not store more than ' +
+                                 str(limit) + ' different values')
+            names.append(name)
+        return names.index(name)
+
+    def add(self, t_id, t_session_name, t_type):
+        session_code = self.code(self.session_names, t_session_name, 32)
+        type_code = self.code(self.type_names, t_type, 2 ** self.type_bits)
+        self.ids[int(t_id)] = (session_code << self.type_bits) | type_code
+
+    def get(self, t_id):
+        # returns (t_session_name, t_type) or None for unknown IDs
+        packed = self.ids.get(int(t_id))
+        if packed is None:
+            return None
+        return (self.session_names[packed >> self.type_bits],
+                self.type_names[packed & (2 ** self.type_bits - 1)])
+
+    def __contains__(self, t_id):
+        return int(t_id) in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class NodeRegistry():
+    """In-memory map of the node keys of a seed to their ids in the nodes table.
+
+    New nodes get the next id right away and are kept in new until the
+    WriteBuffer has written them, so edges can be buffered with the ids of
+    nodes that are not in the database yet.
+    """
+
+    def __init__(self, db=None):
+        self.ids = {}
+        self.next_id = 1
+        self.new = []
+        if db:
+            self.load(db)
+
+    def load(self, db):
+        for id, key in db.executesql('SELECT id, key FROM nodes;'):
+            self.ids[key] = id
+            self.next_id = max(self.next_id, id + 1)
+
+    def get(self, kind, key, label):
+        # id of the node with key, a new node is added if there is none
+        id = self.ids.get(key)
+        if id is None:
+            id = self.next_id
+            self.next_id += 1
+            self.ids[key] = id
+            self.new.append((id, kind, key, label))
+        return id
+
+    def written(self):
+        self.new = []
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class EntityCache():
+    """Cache of resolved usernames, t.me links and invite hashes.
+
+    Shared by all seeds in data/_entity_cache.sqlite. Every entry keeps the
+    peer id, type and access hash of the entity together with the session
+    that resolved it, because access hashes are only valid for that
+    account. Entries expire after ttl days, above size entries the least
+    recently used ones are removed.
+    """
+    evict_every = 1000
+
+    def __init__(self, file, ttl, size):
+        self.ttl = ttl * 86400
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.connection = sqlite3.connect(file)
+        self.connection.execute('PRAGMA journal_mode = WAL;')
+        self.connection.execute('PRAGMA synchronous = NORMAL;')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS entity_cache (
+            key TEXT PRIMARY KEY,
+            session_name TEXT,
+            peer_id INTEGER,
+            peer_type TEXT,
+            access_hash INTEGER,
+            resolved REAL,
+            used REAL);''')
+        self.connection.execute('''CREATE INDEX IF NOT EXISTS entity_cache_used
+            ON entity_cache (used);''')
+        self.connection.commit()
+
+    @staticmethod
+    def key(input):
+        # normalized cache key of a username, t.me link or invite hash,
+        # None for anything else like IDs or phone numbers
+        text = str(input).strip()
+        match = re.search(r"(?:t|telegram)\.(?:me|org|dog)/(?:joinchat/|\+)([\w-]+)",
+                          text, flags=re.IGNORECASE)
+        if match:
+            # invite hashes are case sensitive
+            return '+' + match.group(1)
+        if text.startswith('+') and not text[1:].isdigit():
+            return text
+        match = re.search(r"(?:t|telegram)\.(?:me|org|dog)/(?:s/)?(\w{4,32})",
+                          text, flags=re.IGNORECASE)
+        if match:
+            return '@' + match.group(1).lower()
+        if re.fullmatch(r"@?\w{4,32}", text) and not text.lstrip('@').isdigit():
+            return '@' + text.lstrip('@').lower()
+        return None
+
+    def get(self, key):
+        # returns (session_name, peer_id, peer_type, access_hash) or None
+        row = self.connection.execute(
+            'SELECT session_name, peer_id, peer_type, access_hash, resolved '
+            'FROM entity_cache WHERE key = ?;', (key,)).fetchone()
+        now = time.time()
+        if row is None or row[4] + self.ttl < now:
+            self.misses += 1
+            if row is not None:
+                self.remove(key)
+            return None
+        self.hits += 1
+        self.connection.execute(
+            'UPDATE entity_cache SET used = ? WHERE key = ?;', (now, key))
+        return row[:4]
+
+    def put(self, key, session_name, peer_id, peer_type, access_hash):
+        now = time.time()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO entity_cache VALUES (?, ?, ?, ?, ?, ?, ?);',
+            (key, session_name, peer_id, peer_type, access_hash, now, now))
+        self.connection.commit()
+        self.puts += 1
+        if self.puts % self.evict_every == 0:
+            self.evict()
+
+    def remove(self, key):
+        self.connection.execute(
+            'DELETE FROM entity_cache WHERE key = ?;', (key,))
+        self.connection.commit()
+
+    def evict(self):
+        self.connection.execute(
+            'DELETE FROM entity_cache WHERE resolved < ?;',
+            (time.time() - self.ttl,))
+        self.connection.execute(
+            'DELETE FROM entity_cache WHERE key IN (SELECT key FROM entity_cache '
+            'ORDER BY used DESC LIMIT -1 OFFSET ?);', (self.size,))
+        self.connection.commit()
+
+    def save(self):
+        self.evict()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        if lookups > 0:
+            rate = str(round(self.hits / lookups * 100, 1)) + '%'
+        else:
+            rate = '-'
+        return 'Entity cache: ' + str(self.hits) + ' hits, ' + \
+            str(self.misses) + ' misses, hit rate ' + rate
+
+
+class NegativeCache():
+    """Usernames and invitation hashes Telegram could not resolve.
+
+    Kept next to the entity cache and loaded into memory, so names that are
+    repeated in a chat do not trigger a new request. Entries expire after
+    ttl hours, because usernames can be taken later on.
+    """
+
+    def __init__(self, file, ttl):
+        self.ttl = ttl * 3600
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(file)
+        self.connection.execute('PRAGMA journal_mode = WAL;')
+        self.connection.execute('PRAGMA synchronous = NORMAL;')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS negative_cache (
+            key TEXT PRIMARY KEY,
+            reason TEXT,
+            checked REAL);''')
+        self.connection.execute(
+            'DELETE FROM negative_cache WHERE checked < ?;',
+            (time.time() - self.ttl,))
+        self.connection.commit()
+        self.keys = dict(self.connection.execute(
+            'SELECT key, checked FROM negative_cache;'))
+
+    def check(self, key):
+        # True if the key could not be resolved within the last ttl hours
+        if key is None:
+            return False
+        checked = self.keys.get(key)
+        if checked is not None and checked + self.ttl >= time.time():
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key, reason):
+        if key is None:
+            return
+        now = time.time()
+        self.keys[key] = now
+        self.connection.execute(
+            'INSERT OR REPLACE INTO negative_cache VALUES (?, ?, ?);',
+            (key, reason, now))
+        self.connection.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        if lookups > 0:
+            rate = str(round(self.hits / lookups * 100, 1)) + '%'
+        else:
+            rate = '-'
+        return 'Negative cache: ' + str(self.hits) + ' hits, ' + \
+            str(self.misses) + ' misses, hit rate ' + rate
+
+
+class AnalysisCache():
+    """Results of the analysis stages of a seed, kept in data/<seed>/analysis_cache.
+
+    Every stage result is stored in its own pickle file together with the
+    key it was computed for. The key of a stage is built from the
+    fingerprints of the tables it reads and the [Analyze] settings it uses,
+    so a stage is only computed again if one of them changed. A table
+    fingerprint is its number of rows and highest rowid, rows are only
+    added to the tables of a seed, together with the watermarks of the
+    tables whose rows are updated in place. If enabled is False nothing is
+    read or written.
+    """
+    # returned by get for results that are not stored, a stage may
+    # return None
+    missing = object()
+    # table -> [(table the watermark is kept in, query)]
+    watermarks = {
+        # update_nodes sets kind and label of the nodes it has not seen
+        # and of the telegram IDs resolved since
+        'nodes': [('node_pass', 'SELECT MAX(last_id) FROM node_pass;'),
+                  ('t_ids', 'SELECT COUNT(*), MAX(last_check) FROM t_ids;')],
+    }
+
+    def __init__(self, folder, connection, enabled=True):
+        self.folder = os.path.join(folder, 'analysis_cache')
+        self.connection = connection
+        self.enabled = enabled
+        self.fingerprints = {}
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            os.makedirs(self.folder, exist_ok=True)
+
+    def exists(self, table):
+        return self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = ?;", (table,)).fetchone() is not None
+
+    def fingerprint(self, table):
+        if table not in self.fingerprints:
+            values = [table]
+            if self.exists(table):
+                values.append(self.connection.execute(
+                    'SELECT COUNT(*), MAX(rowid) FROM ' + table + ';').fetchone())
+                for watermark, query in self.watermarks.get(table, []):
+                    if self.exists(watermark):
+                        values.append(self.connection.execute(query).fetchone())
+            self.fingerprints[table] = hashlib.sha1(
+                repr(values).encode()).hexdigest()
+        return self.fingerprints[table]
+
+    def key(self, tables, *settings):
+        # key of a stage reading tables with settings, settings may also
+        # be the keys of the stages it depends on
+        digest = hashlib.sha1()
+        for table in tables:
+            digest.update(self.fingerprint(table).encode())
+        digest.update(repr(settings).encode())
+        return digest.hexdigest()
+
+    def file(self, stage):
+        return os.path.join(self.folder, stage + '.pickle')
+
+    def get(self, stage, key):
+        # the stored result of stage if it was computed for key, else missing
+        if self.enabled and os.path.exists(self.file(stage)):
+            try:
+                with open(self.file(stage), 'rb') as file:
+                    stored_key, result = pickle.load(file)
+                if stored_key == key:
+                    self.hits += 1
+                    return result
+            except Exception as e:
+                print('Analysis cache ' + stage + ' unreadable: ' + str(e))
+        self.misses += 1
+        return self.missing
+
+    def put(self, stage, key, result):
+        if not self.enabled:
+            return
+        # written to a temporary file first, so an interrupted run leaves
+        # the previous result
+        temp = self.file(stage) + '.tmp'
+        with open(temp, 'wb') as file:
+            pickle.dump((key, result), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, self.file(stage))
+
+    def stats(self):
+        return 'Analysis cache: ' + str(self.hits) + ' stages reused, ' + \
+            str(self.misses) + ' computed'
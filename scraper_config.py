@@ -0,0 +1,239 @@
+#!/usr/bin/python3
+from configparser import ConfigParser
+
+
+class Initiator():
+    # the warning about a single line of keywords is printed once
+    keywords_warned = False
+
+    def __init__(self, inifile):
+        self.inifile = inifile
+        self.config = ConfigParser()
+        self.config.read(inifile)
+        # DEFAULT
+        self.examiner = self.config['DEFAULT']['examiner']
+        self.hops = int(self.config['DEFAULT']['hops'])
+        # one keyword or phrase per line
+        self.keywords = self.split_keywords(self.config['DEFAULT']['keywords'])
+        self.keyword_match = self.config['DEFAULT'].get(
+            'keyword_match', fallback='substring')
+        self.merge_conflicts = self.config['DEFAULT'].get(
+            'merge_conflicts', fallback='newer')
+
+        # Telegram
+        self.seeds = self.config['Telegram']['seeds'].split()
+        self.max_messages = int(self.config['Telegram']['max_messages'])
+        self.min_rate = self.config['Telegram'].getfloat(
+            'min_rate', fallback=0.1)
+        self.max_rate = self.config['Telegram'].getfloat(
+            'max_rate', fallback=3.0)
+        self.max_delay = int(self.config['Telegram']['max_delay'])
+        self.follow_invitations = self.config['Telegram'].getboolean(
+            'follow_invitations')
+        self.parallel = self.config['Telegram'].getboolean(
+            'parallel', fallback=True)
+        self.batch_size = self.config['Telegram'].getint(
+            'batch_size', fallback=500)
+        self.priority = self.config['Telegram'].get(
+            'priority', fallback='hop')
+        self.warm_dialogs = self.config['Telegram'].getboolean(
+            'warm_dialogs', fallback=True)
+        self.dialogs_ttl = self.config['Telegram'].getfloat(
+            'dialogs_ttl', fallback=24.0)
+        self.entity_cache_ttl = self.config['Telegram'].getfloat(
+            'entity_cache_ttl', fallback=30.0)
+        self.entity_cache_size = self.config['Telegram'].getint(
+            'entity_cache_size', fallback=100000)
+        self.negative_cache_ttl = self.config['Telegram'].getfloat(
+            'negative_cache_ttl', fallback=24.0)
+
+        # URL
+        self.use_short = self.config['URL'].getboolean('use_short')
+        self.shortener = self.config['URL'].get('shortener', fallback='tinyurl')
+        self.url_workers = self.config['URL'].getint('workers', fallback=4)
+        self.url_batch_size = self.config['URL'].getint(
+            'batch_size', fallback=20)
+        self.url_retries = self.config['URL'].getint('retries', fallback=3)
+
+        # Analyze
+        self.show_hops = int(self.config['Analyze']['show_hops'])
+        self.num_communities = int(self.config['Analyze']['num_communities'])
+        self.contacts = self.config['Analyze'].getboolean('contacts')
+        self.bots = self.config['Analyze'].getboolean('bots')
+        self.chats = self.config['Analyze'].getboolean('chats')
+        self.channels = self.config['Analyze'].getboolean('channels')
+        self.telegram_ids = self.config['Analyze'].getboolean('telegram_ids')
+        self.urls = self.config['Analyze'].getboolean('urls')
+        self.o_entities = self.config['Analyze'].getboolean('o_entities')
+        self.keys = self.config['Analyze'].getboolean('keys')
+        # report sections, their libraries are only loaded when enabled
+        self.plots = self.config['Analyze'].getboolean('plots', fallback=True)
+        self.powerlaw = self.config['Analyze'].getboolean(
+            'powerlaw', fallback=True)
+        self.sockpuppets = self.config['Analyze'].getboolean(
+            'sockpuppets', fallback=True)
+        # threads of the networkit algorithms, 0 uses all cores
+        self.threads = self.config['Analyze'].getint('threads', fallback=0)
+        # exact or approximate metrics, the error bound and node samples of
+        # the estimators
+        self.precision = self.config['Analyze'].get(
+            'precision', fallback='exact')
+        self.epsilon = self.config['Analyze'].getfloat('epsilon', fallback=0.01)
+        self.samples = self.config['Analyze'].getint('samples', fallback=1000)
+        # effective diameter, betweenness and closeness also with exact
+        # precision, they take O(n*m)
+        self.extra_metrics = self.config['Analyze'].getboolean(
+            'extra_metrics', fallback=False)
+        # reuse the results of earlier runs in data/<seed>/analysis_cache
+        self.analysis_cache = self.config['Analyze'].getboolean(
+            'cache', fallback=True)
+        # processes running the analysis stages, 0 uses one per core
+        self.workers = self.config['Analyze'].getint('workers', fallback=0)
+        self.color_contact = self.config['Analyze']['color_contact']
+        self.color_bot = self.config['Analyze']['color_bot']
+        self.color_chat = self.config['Analyze']['color_chat']
+        self.color_channel = self.config['Analyze']['color_channel']
+        self.color_telegram_id = self.config['Analyze']['color_telegram_id']
+        self.color_url = self.config['Analyze']['color_url']
+        self.color_o_entity = self.config['Analyze']['color_o_entity']
+        self.color_keyword = self.config['Analyze']['color_keyword']
+        self.color_none = self.config['Analyze']['color_none']
+
+        # Sessions
+        self.s_name = []
+        self.s_api_id = []
+        self.s_api_hash = []
+        self.s_wait_until = []
+        self.s_rate = []
+        self.s_dialogs_loaded = []
+
+        # count available t_session[x] sections in scraper.ini
+        self.s_slots = 0
+        for section in self.config.sections():
+            if section[0:9] == "t_session":
+                self.s_slots += 1
+        for s_count in range(1, self.s_slots):
+            s_config_section = self.config['t_session' + str(s_count)]
+            if s_config_section['name']:
+                self.s_name.append(s_config_section['name'])
+                self.s_api_id.append(int(s_config_section['api_id']))
+                self.s_api_hash.append(s_config_section['api_hash'])
+                self.s_wait_until.append(int(s_config_section['wait_until']))
+                if s_config_section.get('rate'):
+                    self.s_rate.append(float(s_config_section['rate']))
+                else:
+                    self.s_rate.append(self.max_rate)
+                if s_config_section.get('dialogs_loaded'):
+                    self.s_dialogs_loaded.append(
+                        int(s_config_section['dialogs_loaded']))
+                else:
+                    self.s_dialogs_loaded.append(0)
+
+    def append_seed(self, newSeed):
+        self.config = ConfigParser()
+        self.config.read(self.inifile)
+        seedList = self.seeds
+        seedList.append(newSeed)
+        self.config['Telegram']['seeds'] = '\n'.join(seedList)
+        with open(self.inifile, 'w') as configfile:
+            self.config.write(configfile)
+        self.seeds = self.config['Telegram']['seeds'].split()
+
+    def remove_seed(self, remSeed):
+        self.config = ConfigParser()
+        self.config.read(self.inifile)
+        seedList = self.seeds
+        seedList.remove(remSeed)
+        self.config['Telegram']['seeds'] = '\n'.join(seedList)
+        with open(self.inifile, 'w') as configfile:
+            self.config.write(configfile)
+        self.seeds = self.config['Telegram']['seeds'].split()
+
+    def split_lines(self, value):
+        return [line.strip() for line in value.splitlines() if line.strip()]
+
+    def split_keywords(self, value):
+        # keywords used to be separated by spaces, a list in one line is
+        # still split into words
+        keywords = self.split_lines(value)
+        if len(keywords) == 1 and len(keywords[0].split()) > 1:
+            if not Initiator.keywords_warned:
+                Initiator.keywords_warned = True
+                print('DEFAULT -> keywords is a single line, its words are '
+                      'used as keywords. Put every keyword or phrase on its '
+                      'own line.')
+            keywords = keywords[0].split()
+        return keywords
+
+    def append_keyword(self, newKey):
+        self.config = ConfigParser()
+        self.config.read(self.inifile)
+        keyList = self.keywords
+        keyList.append(newKey)
+        self.config['DEFAULT']['keywords'] = '\n'.join(keyList)
+        with open(self.inifile, 'w') as configfile:
+            self.config.write(configfile)
+        self.keywords = self.split_keywords(self.config['DEFAULT']['keywords'])
+
+    def remove_keyword(self, remKey):
+        self.config = ConfigParser()
+        self.config.read(self.inifile)
+        keyList = self.keywords
+        keyList.remove(remKey)
+        self.config['DEFAULT']['keywords'] = '\n'.join(keyList)
+        with open(self.inifile, 'w') as configfile:
+            self.config.write(configfile)
+        self.keywords = self.split_keywords(self.config['DEFAULT']['keywords'])
+
+    def set_wait(self, name, wait_until):
+        try:
+            self.config = ConfigParser()
+            self.config.read(self.inifile)
+            for s_count in range(len(self.s_name)):
+                if name == self.s_name[s_count]:
+                    section_name = 't_session' + str(s_count + 1)
+                    self.config[section_name]['wait_until'] = str(wait_until)
+            with open(self.inifile, 'w') as configfile:
+                self.config.write(configfile)
+
+        except Exception as e:
+            print('Error writing scraper.ini File: ' + str(e))
+
+    def set_rate(self, name, rate):
+        try:
+            self.config = ConfigParser()
+            self.config.read(self.inifile)
+            for s_count in range(len(self.s_name)):
+                if name == self.s_name[s_count]:
+                    section_name = 't_session' + str(s_count + 1)
+                    self.config[section_name]['rate'] = str(round(rate, 3))
+            with open(self.inifile, 'w') as configfile:
+                self.config.write(configfile)
+
+        except Exception as e:
+            print('Error writing scraper.ini File: ' + str(e))
+
+    def set_dialogs_loaded(self, name, loaded):
+        try:
+            self.config = ConfigParser()
+            self.config.read(self.inifile)
+            for s_count in range(len(self.s_name)):
+                if name == self.s_name[s_count]:
+                    section_name = 't_session' + str(s_count + 1)
+                    self.config[section_name]['dialogs_loaded'] = str(loaded)
+            with open(self.inifile, 'w') as configfile:
+                self.config.write(configfile)
+
+        except Exception as e:
+            print('Error writing scraper.ini File: ' + str(e))
+
+    def set_inisetting(self, section, setting, value):
+        try:
+            self.config = ConfigParser()
+            self.config.read(self.inifile)
+            self.config[section][setting] = value
+            with open(self.inifile, 'w') as configfile:
+                self.config.write(configfile)
+
+        except Exception as e:
+            print('Error writing scraper.ini File: ' + str(e))
@@ -0,0 +1,231 @@
+#!/usr/bin/python3
+import sqlite3
+
+# connection settings for the scrape databases, WAL is stored in the file,
+# the other pragmas have to be set for every connection
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode = WAL;',
+    'PRAGMA synchronous = NORMAL;',
+    'PRAGMA cache_size = -65536;',
+    'PRAGMA mmap_size = 268435456;',
+    'PRAGMA temp_store = MEMORY;',
+]
+
+# name, table, columns, unique
+SQLITE_INDEXES = [
+    ('t_ids_t_id', 't_ids', 't_id', True),
+    ('t_ids_hop', 't_ids', 'hop', False),
+    ('t_chats_chat_id', 't_chats', 'chat_id', True),
+    ('t_contacts_contact_id', 't_contacts', 'contact_id', True),
+    ('t_messages_entity_message', 't_messages', 'entity_id, message_id', True),
+    ('t_urls_url', 't_urls', 'url', False),
+    ('o_entities_entity', 'o_entities', 'entity', False),
+    ('o_urls_url', 'o_urls', 'url', True),
+    # also finds the edges of a source, merging looks up duplicate edges
+    ('edges_source_target', 'edges', 'source, target, message_id', False),
+    ('edges_target', 'edges', 'target', False),
+    ('keyword_hits_keyword', 'keyword_hits', 'keyword', False),
+    ('keyword_hits_message', 'keyword_hits', 'entity_id, message_id', False),
+]
+
+# the graph of a seed, every entity, URL, keyword and other entity is one
+# node, its key never changes, its label is the name shown in the report
+GRAPH_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS nodes (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL UNIQUE,
+        label TEXT);''',
+    '''CREATE TABLE IF NOT EXISTS edges (
+        source INTEGER NOT NULL,
+        target INTEGER NOT NULL,
+        message_id INTEGER,
+        timestamp REAL,
+        hop INTEGER);''',
+]
+
+# node kinds of Telegram entities, their key is the Telegram ID
+ENTITY_KINDS = ['telegram_id', 'contact', 'bot', 'chat', 'channel', 'unknown']
+
+
+def digits(column):
+    # SQL condition for a text column holding a numeric ID, like str.isdigit()
+    return "(" + column + " <> '' AND " + column + " NOT GLOB '*[^0-9]*')"
+
+
+def node_key(kind, value):
+    # canonical key of a node, the Telegram ID for entities
+    if kind in ENTITY_KINDS or kind == 't_id':
+        return str(int(value))
+    return kind + ':' + str(value)
+
+
+def set_pragmas(connection):
+    for pragma in SQLITE_PRAGMAS:
+        connection.execute(pragma)
+
+
+def create_indexes(connection):
+    # also migrates databases created before the indexes existed
+    tables = set(row[0] for row in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table';"))
+    for name, table, columns, unique in SQLITE_INDEXES:
+        if table not in tables:
+            continue
+        if unique:
+            try:
+                connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ' +
+                                   name + ' ON ' + table + ' (' + columns + ');')
+                continue
+            except sqlite3.IntegrityError:
+                print('Duplicate rows in ' + table + ' (' + columns + '),' +
+                      ' creating a non unique index instead.')
+        connection.execute('CREATE INDEX IF NOT EXISTS ' +
+                           name + ' ON ' + table + ' (' + columns + ');')
+    connection.commit()
+
+
+def create_graph_tables(connection):
+    for statement in GRAPH_TABLES:
+        connection.execute(statement)
+    connection.commit()
+
+
+def migrate_mentions(connection):
+    """Moves the rows of the mentions table of older databases into nodes and edges.
+
+    mentions stored the names written by the post-processing pass instead
+    of the Telegram IDs, so names are mapped back to the ID of the contact
+    or chat that has them, which also joins the nodes of renamed entities.
+    Short URLs are mapped back to their URL. The mentions table is dropped
+    and the database vacuumed afterwards. Returns True if it migrated.
+    """
+    tables = set(row[0] for row in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table';"))
+    if 'mentions' not in tables:
+        return False
+    print('Migrating mentions to nodes and edges')
+    create_graph_tables(connection)
+    connection.execute('CREATE TEMP TABLE entity_names '
+                       '(name TEXT PRIMARY KEY, t_id INTEGER);')
+    connection.execute(
+        "INSERT OR IGNORE INTO temp.entity_names "
+        "SELECT user_name, contact_id FROM t_contacts WHERE user_name <> '' "
+        "UNION ALL SELECT phone_number, contact_id FROM t_contacts "
+        "WHERE phone_number <> '' "
+        "UNION ALL SELECT chat_username, chat_id FROM t_chats "
+        "WHERE chat_username <> '';")
+    connection.execute('CREATE TEMP TABLE short_urls '
+                       '(short TEXT PRIMARY KEY, url TEXT);')
+    connection.execute(
+        "INSERT OR IGNORE INTO temp.short_urls "
+        "SELECT short, url FROM o_urls WHERE short IS NOT NULL;")
+
+    # node key of every label and type used in mentions, IDs of unresolved
+    # contents were stored with type t_id, of sources with no type
+    entity_kinds = ", ".join("'" + kind + "'" for kind in ENTITY_KINDS)
+    connection.execute('CREATE TEMP TABLE mention_keys (label TEXT, type TEXT, '
+                       'kind TEXT, key TEXT, PRIMARY KEY (label, type));')
+    connection.execute(
+        "INSERT OR IGNORE INTO temp.mention_keys "
+        "SELECT label, type, kind, CASE "
+        "WHEN kind IN (" + entity_kinds + ") THEN COALESCE(CAST(("
+        "SELECT t_id FROM temp.entity_names WHERE name = label) AS TEXT), "
+        "CASE WHEN " + digits('label') + " THEN label "
+        "ELSE kind || ':' || label END) "
+        "WHEN kind = 'url' THEN 'url:' || COALESCE(("
+        "SELECT url FROM temp.short_urls WHERE short = label), label) "
+        "ELSE kind || ':' || label END "
+        "FROM (SELECT label, type, CASE "
+        "WHEN type IS NULL OR type IN ('', 't_id') THEN 'telegram_id' "
+        "ELSE type END AS kind FROM ("
+        "SELECT DISTINCT source AS label, s_type AS type FROM mentions "
+        "UNION SELECT DISTINCT content, c_type FROM mentions));")
+    connection.execute(
+        "INSERT OR IGNORE INTO nodes (kind, key, label) "
+        "SELECT kind, key, label FROM temp.mention_keys;")
+    connection.execute(
+        "INSERT INTO edges (source, target, message_id, timestamp, hop) "
+        "SELECT source_node.id, target_node.id, "
+        "CAST(mentions.message_id AS INTEGER), "
+        "round((julianday(mentions.timestamp) - 2440587.5) * 86400.0, 3), "
+        "CAST(mentions.hop AS INTEGER) "
+        "FROM mentions "
+        "JOIN temp.mention_keys AS source_key ON source_key.label = mentions.source "
+        "AND source_key.type IS mentions.s_type "
+        "JOIN nodes AS source_node ON source_node.key = source_key.key "
+        "JOIN temp.mention_keys AS target_key ON target_key.label = mentions.content "
+        "AND target_key.type IS mentions.c_type "
+        "JOIN nodes AS target_node ON target_node.key = target_key.key "
+        "ORDER BY mentions.id;")
+    for table in ['entity_names', 'short_urls', 'mention_keys']:
+        connection.execute('DROP TABLE temp.' + table + ';')
+    connection.execute('DROP TABLE mentions;')
+    connection.execute('DROP TABLE IF EXISTS mention_pass;')
+    connection.commit()
+    # current names and types of the entities
+    update_nodes(connection, False)
+    connection.execute('VACUUM;')
+    return True
+
+
+def update_nodes(connection, use_short):
+    """Sets type and name of the entity nodes and the short form of the URL nodes.
+
+    Only the nodes added since the last pass, whose id is kept in
+    node_pass, and the entities that were not known yet are updated, in a
+    few set based statements. Returns the number of new nodes.
+    """
+    connection.execute('CREATE TABLE IF NOT EXISTS node_pass '
+                       '(last_id INTEGER);')
+    last_id = connection.execute(
+        'SELECT MAX(last_id) FROM node_pass;').fetchone()[0] or 0
+    max_id = connection.execute(
+        'SELECT MAX(id) FROM nodes;').fetchone()[0] or 0
+    pending = '(id > ' + str(int(last_id)) + " OR kind = 'telegram_id') AND " + \
+        digits('key')
+
+    # type and name of every known ID of the pending nodes
+    connection.execute('DROP TABLE IF EXISTS temp.node_names;')
+    connection.execute('CREATE TEMP TABLE node_names '
+                       '(t_id INTEGER PRIMARY KEY, type TEXT, name TEXT);')
+    connection.execute(
+        "INSERT OR IGNORE INTO temp.node_names "
+        "SELECT t_ids.t_id, "
+        "CASE WHEN t_contacts.is_bot = 'T' THEN 'bot' ELSE t_ids.t_type END, "
+        "COALESCE(NULLIF(t_contacts.user_name, ''), "
+        "NULLIF(t_contacts.phone_number, ''), "
+        "NULLIF(t_chats.chat_username, '')) "
+        "FROM t_ids "
+        "LEFT JOIN t_contacts ON t_ids.t_type = 'contact' "
+        "AND t_contacts.contact_id = t_ids.t_id "
+        "LEFT JOIN t_chats ON t_ids.t_type IN ('chat', 'channel') "
+        "AND t_chats.chat_id = t_ids.t_id "
+        "WHERE t_ids.t_id IN (SELECT CAST(key AS INTEGER) FROM nodes "
+        "WHERE " + pending + ");")
+    connection.execute(
+        "UPDATE nodes SET "
+        "kind = COALESCE((SELECT type FROM temp.node_names "
+        "WHERE t_id = CAST(nodes.key AS INTEGER)), kind), "
+        "label = COALESCE((SELECT name FROM temp.node_names "
+        "WHERE t_id = CAST(nodes.key AS INTEGER)), label) "
+        "WHERE " + pending + ";")
+    connection.execute('DROP TABLE temp.node_names;')
+
+    if use_short:
+        added = 'id > ' + str(int(last_id)) + " AND kind = 'url'"
+        for row in connection.execute(
+                "SELECT label FROM nodes WHERE " + added + " AND "
+                "substr(key, 5) NOT IN "
+                "(SELECT url FROM o_urls WHERE short IS NOT NULL);"):
+            print("No short URL for Entry " + row[0] + " has been found!")
+        connection.execute(
+            "UPDATE nodes SET label = (SELECT short FROM o_urls "
+            "WHERE o_urls.url = substr(nodes.key, 5)) "
+            "WHERE " + added + " AND substr(key, 5) IN "
+            "(SELECT url FROM o_urls WHERE short IS NOT NULL);")
+
+    connection.execute('DELETE FROM node_pass;')
+    connection.execute('INSERT INTO node_pass VALUES (?);', (max_id,))
+    connection.commit()
+    return max_id - last_id
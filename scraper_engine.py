@@ -0,0 +1,829 @@
+#!/usr/bin/python3
+import asyncio
+import time
+
+from collections import deque
+from datetime import datetime
+from scraper_buffer import WriteBuffer
+from scraper_cache import EntityCache
+from scraper_db import update_nodes
+from scraper_model import Request, RequestState, RequestError, ScrapeError
+from scraper_scan import TextScanner
+from scraper_schedule import Scheduler
+from scraper_urls import UrlShortener
+from tabulate import tabulate
+from telethon import types, utils
+
+
+class ScrapeEngine():
+    """Scrapes the seeds of scraper.ini with the sessions of a ScraperService.
+
+    All Telegram requests are native Telethon coroutines. Entities are
+    scheduled as soon as they are found, every session pulls its next
+    entity from the Scheduler, so the hops overlap. With [Telegram]
+    parallel = True the sessions work concurrently, otherwise one session
+    after another. refresh() revisits the finished entities of a seed and
+    only requests messages above their watermark.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.iniValues = service.iniValues
+        self.Sessions = service.Sessions
+        self.buffer = None
+        self.ids = None
+        self.urls = None
+        self.shortener = None
+        self.scheduler = None
+        self.scanner = TextScanner(self.iniValues.keywords,
+                                   self.iniValues.keyword_match)
+
+    def run(self, job):
+        # Telethon clients are bound to the default event loop
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(job)
+        finally:
+            # keep everything processed so far, also on crash or Ctrl-C
+            if self.buffer:
+                self.buffer.flush()
+            if self.shortener:
+                self.shortener.cancel()
+
+    def log(self, db, level, log):
+        self.service.log(db, level, log)
+
+    def get_session(self, name):
+        for session in self.Sessions:
+            if session.name == name:
+                return session
+        return None
+
+    async def get_free_session(self, db, resolve=False):
+        # waits for the first session to be unblocked if all sessions are
+        # FloodWait blocked, the session has to be released after use.
+        # resolve is for requests that only resolve a name or invitation,
+        # they may share a session that is busy with another entity
+        if not self.service.pool.available():
+            self.log(db,
+                     "Information",
+                     "All sessions are FloodWait blocked, waiting until " +
+                     str(datetime.fromtimestamp(self.service.pool.earliest())))
+        return await self.service.pool.acquire(resolve)
+
+    def save_id(self, db, t_id, t_session_name, t_type, hop):
+        if t_id not in self.ids:
+            db.t_ids.insert(t_id=t_id,
+                            t_session_name=t_session_name,
+                            t_type=t_type,
+                            hop=hop,
+                            msg_count=0,
+                            scrape_state='Identified',
+                            last_check=datetime.now())
+            self.ids.add(t_id, t_session_name, t_type)
+            self.scheduler.add(t_id, t_session_name, t_type, hop)
+            return True
+        else:
+            return False
+
+    def update_id(self, db, t_id, scrape_state):
+        # write pending messages before the state of an entity changes
+        self.buffer.flush()
+        rowCount = db(db.t_ids.t_id == t_id).update(scrape_state=scrape_state,
+                                                    last_check=datetime.now())
+        db.commit()
+        if rowCount == 1:
+            return True
+        else:
+            return False
+
+    def save_user(self, db, user, session_name, hop):
+        if self.save_id(db, user.id, session_name, 'contact', hop):
+            db.t_contacts.insert(contact_id=user.id,
+                                 is_bot=user.bot,
+                                 first_name=user.first_name,
+                                 last_name=user.last_name,
+                                 user_name=user.username,
+                                 phone_number=user.phone)
+            return True
+        else:
+            return False
+
+    def save_chat(self, db, chat, session_name, hop):
+        # get type
+        if isinstance(chat, types.Chat):
+            my_chat_type = 'chat'
+        elif isinstance(chat, types.Channel):
+            my_chat_type = 'channel'
+        else:
+            my_chat_type = 'unknown'
+
+        if self.save_id(db, chat.id, session_name, my_chat_type, hop):
+            db.t_chats.insert(chat_id=chat.id,
+                              chat_title=chat.title,
+                              chat_username=getattr(chat, 'username', None),
+                              chat_type=my_chat_type,
+                              is_broadcast=getattr(chat, 'broadcast', False),
+                              is_megagroup=getattr(chat, 'megagroup', False),
+                              is_gigagroup=getattr(chat, 'gigagroup', False))
+            return True
+        else:
+            return False
+
+    def save_mention(self, db, source, content, type, message_id, timestamp, hop):
+        if not source == content:
+            if str(content).isdigit():
+                content = str(content)
+
+            if len(content) > 0:
+                if type == "t_id":
+                    self.scheduler.mention(int(content))
+                self.buffer.add_mention(source,
+                                        content,
+                                        str(type),
+                                        message_id,
+                                        timestamp,
+                                        hop)
+                if type == "url":
+                    self.save_url(db, content)
+            else:
+                print("empt content, message: " + str(message_id))
+        else:
+            # self reference
+            pass
+
+    def save_url(self, db, url):
+        # the short form is written later if the shortener works in the background
+        if url not in self.urls:
+            self.urls.add(url)
+            self.buffer.add_url(url, self.shortener.shorten(url))
+
+    def lookup_name(self, db, t_id, t_type):
+        # find a name for an already known ID in the scraped data
+        name = None
+        if t_type == 'contact':
+            c_row = db.t_contacts(db.t_contacts.contact_id == t_id)
+            if c_row:
+                if c_row.phone_number:
+                    name = c_row.phone_number
+                elif c_row.user_name:
+                    name = c_row.user_name
+        elif t_type == 'chat' or t_type == 'channel':
+            c_row = db.t_chats(db.t_chats.chat_id == t_id)
+            if c_row and c_row.chat_username:
+                name = c_row.chat_username
+        return name
+
+    async def resolve_string(self, db, name):
+        # resolve a name with any session, switch sessions on FloodWait,
+        # (session, entity, RequestState of the last request)
+        while True:
+            mySession = await self.get_free_session(db, resolve=True)
+            try:
+                entity, state = await mySession.get_entity_from_string(name)
+            finally:
+                self.service.pool.release(mySession)
+            if entity or state != RequestState.FloodWait:
+                break
+
+        if state == RequestState.Failed:
+            print(' - Request for ' + str(name) +
+                  ' has failed!')
+        return mySession, entity, state
+
+    async def process_entity(self, db, input, hop, sender_id, message_id, timestamp):
+        entity = None
+        name = None
+        mySession = None
+        # normalisie ID
+        str_input = str(input)
+        if str_input.lstrip('-').isdigit():
+            input = int(input)
+            if input < 0:
+                input, peer_type = utils.resolve_id(input)
+            known = self.ids.get(input)
+            if known:
+                t_session_name, t_type = known
+                # find session, which knows the ID
+                mySession = self.get_session(t_session_name)
+                # read if Session is not Floodwait blocked
+                # the request is counted by the pool like all others
+                if mySession and not mySession.waiting:
+                    self.service.pool.use(mySession)
+                    try:
+                        entity, state = await mySession.get_entity_from_id(
+                            input, t_type)
+                    finally:
+                        self.service.pool.release(mySession)
+                # try to figure out the name in other ways
+                if not entity:
+                    name = self.lookup_name(db, input, t_type)
+                if not name:
+                    name = input
+
+        if not entity:
+            if not name:
+                name = input
+            key = EntityCache.key(name)
+            if not self.service.negative_cache.check(key):
+                mySession, entity, state = await self.resolve_string(db, name)
+                if state == RequestState.NotFound:
+                    self.service.negative_cache.add(key, 'NotFound')
+
+        if not entity:
+            # If not found yet, save as other ID
+            if not str(input).isdigit():
+                db.o_entities.update_or_insert(
+                    entity=input, kind='other')
+                if sender_id and message_id:
+                    self.save_mention(db, sender_id, str_input,
+                                      "o_entity", message_id, timestamp, hop)
+                return 'otherEntity'
+            else:
+                # numeric ID that could not be found in Telegram -> dismiss.
+                return 'notFound'
+
+        else:
+            # sender_id and message_id only come with a message
+            if sender_id and message_id:
+                self.save_mention(db, sender_id, entity.id, "t_id",
+                                  message_id, timestamp, hop)
+
+            if isinstance(entity, types.User):
+                if self.save_user(db, entity, mySession.name, hop):
+                    return 'newUser'
+                else:
+                    return 'existingUser'
+
+            elif isinstance(entity, types.Chat):
+                if self.save_chat(db, entity, mySession.name, hop):
+                    return 'newChat'
+                else:
+                    return 'existingChat'
+
+            elif isinstance(entity, types.Channel):
+                if self.save_chat(db, entity, mySession.name, hop):
+                    return 'newChannel'
+                else:
+                    return 'existingChannel'
+            else:
+                print("Unknown type of entity " +
+                      str(type(entity)) + " for " + str(input))
+
+    async def process_invitation_link(self, db, h_txt, hop):
+        if self.service.negative_cache.check('+' + h_txt):
+            return False
+        mySession = await self.get_free_session(db, resolve=True)
+        try:
+            return await self.join_invitation(db, mySession, h_txt, hop)
+        finally:
+            self.service.pool.release(mySession)
+
+    async def join_invitation(self, db, mySession, h_txt, hop):
+        try:
+            chat, state = await mySession.get_cached_entity('+' + h_txt)
+            if chat:
+                return self.save_chat(db, chat, mySession.name, hop)
+            result = await mySession.get_invite(h_txt)
+
+        except RequestError as e:
+            if e.state == RequestState.NotFound:
+                self.service.negative_cache.add('+' + h_txt, 'InviteInvalid')
+            print(e)
+            return False
+
+        except Exception as e:
+            print(e)
+            return False
+
+        try:
+            if isinstance(result, types.ChatInvite):
+                chat = await mySession.get_chat_from_invite(h_txt)
+
+            elif isinstance(result, types.ChatInvitePeek) \
+                    or isinstance(result, types.ChatInviteAlready):
+                chat = result.chat
+
+            else:
+                print("Invitation link " + h_txt +
+                      " could not be resolved!")
+                return False
+
+        except RequestError as e:
+            if e.state == RequestState.NotFound:
+                self.service.negative_cache.add('+' + h_txt, 'InviteInvalid')
+            print(e)
+            return False
+
+        if isinstance(chat, types.Chat) \
+                or isinstance(chat, types.Channel):
+            mySession.cache_entity('+' + h_txt, chat)
+            return self.save_chat(db, chat, mySession.name, hop)
+        else:
+            return False
+
+    async def process_message(self, db, message, entity_id, hop):
+        # find sender
+        if message.sender_id:
+            sender_id, peer_type = utils.resolve_id(message.sender_id)
+            if sender_id in self.ids:
+                pass
+            else:
+                await self.process_entity(db, message.sender_id,
+                                          hop, None, None, None)
+        else:
+            sender_id = entity_id
+
+        # WebPreview
+        if message.web_preview:
+            web_preview_url = message.web_preview.url
+            self.save_mention(db, sender_id, web_preview_url,
+                              "url", message.id, message.date, hop)
+        else:
+            web_preview_url = ''
+
+        # save Message, msg_count of the entity is updated on flush
+        self.buffer.add_message(entity_id,
+                                message.id,
+                                sender_id,
+                                message.raw_text,
+                                web_preview_url,
+                                message.date)
+
+        # find keywords, usernames and URLs in message text
+        if message.raw_text == None:
+            return
+        scan = self.scanner.scan(message.raw_text)
+
+        # every hit with its offsets, one mention per keyword and message
+        for keyword, start, end in scan.keywords:
+            self.buffer.add_keyword_hit(entity_id, message.id, keyword,
+                                        start, end)
+        for keyword in dict.fromkeys(hit[0] for hit in scan.keywords):
+            self.save_mention(
+                db,
+                sender_id,
+                keyword,
+                "keyword",
+                message.id,
+                message.date,
+                hop
+            )
+
+        # find Telegram adresses in message text
+        for username in scan.usernames:
+            await self.process_entity(db, username, hop,
+                                      sender_id, message.id, message.date)
+
+        # find Urls in text
+        for url in scan.urls:
+            # Check if Telegram URL
+            if url in scan.telegram_urls:
+                kind = ""
+                # Check if Telegram Invitation Link
+                if self.iniValues.follow_invitations and url in scan.invites:
+                    if await self.process_invitation_link(db, scan.invites[url], hop):
+                        kind = 'valid_invitation'
+                    else:
+                        kind = 'invalid_invitation'
+                if kind == "":
+                    # Check if Entity URL
+                    # select only the entity part of the link
+                    # remove anything right of the ?
+                    q_pos = url.find('?')
+                    if q_pos > 0:
+                        url = url[:q_pos]
+                    # remove anything richt of 4. /
+                    url_list = url.split("/")[0:4]
+                    sep = "/"
+                    entity_url = sep.join(url_list)
+                    # check if we get back an entity
+                    if await self.process_entity(db, entity_url, hop, sender_id, message.id, message.date) != 'notFound':
+                        kind = 'entity'
+                    else:
+                        kind = 'other'
+                        self.save_mention(
+                            db, sender_id, url, "url", message.id, message.date, hop)
+                db.t_urls.update_or_insert(url=url, kind=kind)
+            else:
+                if url != web_preview_url:
+                    self.save_mention(db, sender_id, url, "url",
+                                      message.id, message.date, hop)
+
+    async def resolve_row(self, db, mySession, row):
+        # resolve an already known t_ids row again
+        entity = None
+        # read through peer ID if session not Floodwait blocked
+        if mySession and not mySession.waiting:
+            entity, state = await mySession.get_entity_from_id(
+                row.t_id, row.t_type)
+        # try to resolve through name
+        if not entity:
+            name = self.lookup_name(db, row.t_id, row.t_type)
+            if not name:
+                name = row.t_id
+            mySession, entity, state = await self.resolve_string(db, name)
+
+        if not entity:
+            if self.update_id(db, row.t_id, 'not found'):
+                print(str('Already resolved Entity ' +
+                      str(row.t_id) + ' could not be found again!'))
+            else:
+                print(str('Entry for ' + str(row.t_id) +
+                      ' could not be updated!'))
+        return mySession, entity
+
+    def get_label(self, entity):
+        label = ''
+        if isinstance(entity, types.User):
+            if entity.username != None:
+                label = entity.username
+            elif not ((entity.last_name == None) or (entity.first_name == None)):
+                label = entity.first_name + " " + entity.last_name
+            else:
+                label = entity.phone
+        elif isinstance(entity, types.Chat) or isinstance(entity, types.Channel):
+            label = entity.title
+        if not label:
+            label = str(entity.id)
+        return label
+
+    async def scrape_entity(self, db, session, row, hop):
+        mySession, entity = await self.resolve_row(db, session, row)
+        if not entity:
+            return
+        # the messages are read by the session that resolved the entity,
+        # also if it is not the one of this worker
+        if mySession is not session:
+            self.service.pool.use(mySession)
+        try:
+            await self.scrape_messages(db, mySession, entity, row, hop)
+        finally:
+            if mySession is not session:
+                self.service.pool.release(mySession)
+
+    async def scrape_messages(self, db, mySession, entity, row, hop):
+        # Status message
+        label = self.get_label(entity)
+        print("Scraping Hop:" + str(hop) + " " + mySession.name + " " + label)
+
+        # If the previous scan did not finish, continue below the lowest
+        # processed message id
+        low, high = self.get_watermark(db, row)
+        if not low:
+            low = 0
+
+        # request Messages
+        request = Request()
+        received, low = await self.process_messages(
+            db, mySession.iter_messages_takeout(request, entity, offset_id=low),
+            row.t_id, hop, low)
+
+        if request.state == RequestState.TakeoutWait \
+                and mySession.waiting:
+            if not self.update_id(db, row.t_id, 'TakeoutWait'):
+                raise ScrapeError(
+                    str('Entry for ' + str(entity.id) + ' could not be updated!'))
+            return
+        if request.state == RequestState.FloodWait \
+                and mySession.waiting:
+            if not self.update_id(db, row.t_id, 'FloodWait'):
+                raise ScrapeError(
+                    str('Entry for ' + str(entity.id) + ' could not be updated!'))
+            return
+
+        # Read messages through normal session as fallback, messages
+        # already received through the takeout session are skipped
+        if request.state != RequestState.Accepted:
+            request = Request()
+            count, low = await self.process_messages(
+                db, mySession.iter_messages_normal(request, entity, offset_id=low),
+                row.t_id, hop, low)
+            received += count
+
+            if request.state == RequestState.Failed:
+                if not self.update_id(db, row.t_id, 'RetrieveMessagesFailed'):
+                    raise ScrapeError(
+                        str('Entry for ' + str(entity.id) + ' could not be updated!'))
+                return
+            elif request.state != RequestState.Accepted:
+                if not self.update_id(db, row.t_id, 'FloodWait'):
+                    raise ScrapeError(
+                        str('Entry for ' + str(entity.id) + ' could not be updated!'))
+                return
+
+        print("Scraped Hop:" + str(hop) + " " + mySession.name + " " +
+              label + " " + str(received) + " Messages")
+
+        if not self.update_id(db, row.t_id, 'Finished'):
+            raise ScrapeError(
+                str('Entry for ' + str(entity.id) + ' could not be updated!'))
+
+    async def refresh_entity(self, db, session, row, hop):
+        mySession, entity = await self.resolve_row(db, session, row)
+        if not entity:
+            return
+        if mySession is not session:
+            self.service.pool.use(mySession)
+        try:
+            await self.refresh_messages(db, mySession, entity, row, hop)
+        finally:
+            if mySession is not session:
+                self.service.pool.release(mySession)
+
+    async def refresh_messages(self, db, mySession, entity, row, hop):
+        # only request messages above the highest processed message id,
+        # from old to new so an interrupted refresh leaves no gap
+        low, high = self.get_watermark(db, row)
+        if not high:
+            high = 0
+        request = Request()
+        received, high = await self.process_messages(
+            db, mySession.iter_messages_normal(request, entity, min_id=high,
+                                               reverse=True),
+            row.t_id, hop, high, reverse=True)
+
+        if request.state == RequestState.Failed:
+            if not self.update_id(db, row.t_id, 'RetrieveMessagesFailed'):
+                raise ScrapeError(
+                    str('Entry for ' + str(entity.id) + ' could not be updated!'))
+            return
+        elif request.state != RequestState.Accepted:
+            if not self.update_id(db, row.t_id, 'FloodWait'):
+                raise ScrapeError(
+                    str('Entry for ' + str(entity.id) + ' could not be updated!'))
+            return
+
+        if received > 0:
+            print("Refreshed Hop:" + str(hop) + " " + mySession.name + " " +
+                  self.get_label(entity) + " " + str(received) + " new Messages")
+
+        if not self.update_id(db, row.t_id, 'Finished'):
+            raise ScrapeError(
+                str('Entry for ' + str(entity.id) + ' could not be updated!'))
+
+    async def process_messages(self, db, messages, entity_id, hop, last, reverse=False):
+        # process a message stream, from new to old or with reverse from old
+        # to new. Messages up to the last processed id are skipped. Messages
+        # are written in batches by the write buffer, each batch is a
+        # checkpoint to resume from. Failed requests are reported through
+        # the Request of the message stream.
+        received = 0
+        try:
+            async for message in messages:
+                received += 1
+                if not last \
+                        or (reverse and message.id > last) \
+                        or (not reverse and message.id < last):
+                    await self.process_message(db, message, entity_id, hop + 1)
+                    last = message.id
+        except RequestError:
+            pass
+        finally:
+            await messages.aclose()
+        return received, last
+
+    def get_watermark(self, db, row):
+        # lowest and highest processed message id of an entity
+        if row.min_msg_id is not None:
+            return row.min_msg_id, row.max_msg_id
+        # databases scraped before the watermark existed
+        low = db.t_messages.message_id.min()
+        high = db.t_messages.message_id.max()
+        m_row = db(db.t_messages.entity_id == row.t_id).select(low, high).first()
+        if m_row and m_row[low] is not None:
+            db(db.t_ids.t_id == row.t_id).update(min_msg_id=m_row[low],
+                                                 max_msg_id=m_row[high])
+            return m_row[low], m_row[high]
+        return None, None
+
+    def queue_entities(self, db, hop, states):
+        # one queue of t_ids rows per session, entities stay with the
+        # session that resolved them, orphans go to the shortest queue
+        queues = dict((session.name, deque()) for session in self.Sessions)
+        for row in db(db.t_ids.hop == hop).select():
+            if row.scrape_state in states:
+                if row.t_session_name in queues:
+                    queues[row.t_session_name].append(row)
+                elif len(queues) > 0:
+                    shortest = min(queues, key=lambda name: len(queues[name]))
+                    queues[shortest].append(row)
+        return queues
+
+    async def work_queue(self, db, session, queue, hop, work):
+        while queue:
+            row = queue.popleft()
+            self.service.pool.use(session)
+            try:
+                await work(db, session, row, hop)
+            finally:
+                self.service.pool.release(session)
+
+    async def refresh_hop(self, db, hop):
+        queues = self.queue_entities(db, hop, ['Finished'])
+        workers = [self.work_queue(db, self.get_session(name), queue, hop,
+                                   self.refresh_entity)
+                   for name, queue in queues.items() if queue]
+        await self.run_workers(workers)
+
+    async def run_workers(self, workers):
+        if self.iniValues.parallel:
+            await asyncio.gather(*workers)
+        else:
+            for worker in workers:
+                await worker
+
+    def waiting_sessions(self):
+        # names of the FloodWait blocked sessions
+        return [session.name for session in self.Sessions if session.waiting]
+
+    async def work_schedule(self, db, session, wait=True):
+        # pull scheduled entities until no session has work left, more
+        # entities can be found as long as other sessions are busy. With
+        # wait, a FloodWait blocked session and entities retried later are
+        # waited for instead of leaving them open until the next run
+        try:
+            while True:
+                t_id = None
+                if not session.waiting:
+                    t_id = self.scheduler.pop(session.name, self.waiting_sessions())
+                if t_id is None:
+                    if self.scheduler.busy == 0 and (
+                            not wait or len(self.scheduler) == 0 or
+                            (not session.waiting and
+                             self.scheduler.earliest() is None)):
+                        # the entities left belong to other sessions
+                        return
+                    await self.scheduler.wait(self.wake_in(session))
+                    continue
+                row = db(db.t_ids.t_id == t_id).select().first()
+                self.service.pool.use(session)
+                try:
+                    await self.scrape_entity(db, session, row, row.hop)
+                except:
+                    self.scheduler.release(t_id)
+                    raise
+                finally:
+                    self.service.pool.release(session)
+                self.reschedule(db, session, t_id)
+        finally:
+            # the entities of a worker that ended go to the others
+            self.scheduler.active.discard(session.name)
+            self.scheduler.event.set()
+
+    def wake_in(self, session):
+        # seconds until the next delayed entity is due or a blocked session
+        # is available again, None if only the other sessions can add work
+        now = time.time()
+        wake = [self.scheduler.earliest()]
+        if session.waiting:
+            wake += [self.service.pool.earliest(), session.wait_until]
+        wake = [at for at in wake if at and at > now]
+        if wake:
+            return max(min(wake) - now, 1)
+        return None if self.scheduler.busy else 1
+
+    def reschedule(self, db, session, t_id):
+        row = db(db.t_ids.t_id == t_id).select().first()
+        if row.scrape_state in ['FloodWait', 'TakeoutWait']:
+            self.scheduler.retry(t_id, session.wait_until)
+        elif row.scrape_state in ['Identified', 'Scraping', 'RetrieveMessagesFailed']:
+            self.scheduler.retry(t_id, 0, failed=True)
+        else:
+            self.scheduler.done(t_id)
+
+    async def run_schedule(self, db):
+        self.scheduler.active = set(session.name for session in self.Sessions)
+        # one after another only the last session waits, the others leave
+        # their entities to it
+        last = len(self.Sessions) - 1
+        await self.run_workers([self.work_schedule(
+            db, session, self.iniValues.parallel or i == last)
+            for i, session in enumerate(self.Sessions)])
+
+    def update_nodes(self, db):
+        # types and names of the nodes added since the last pass
+        added = update_nodes(db._adapter.connection, self.iniValues.use_short)
+        self.log(db, "Information", "Updated " + str(added) + " new nodes")
+
+    def open_seed(self, seed, action):
+        db = self.service.connect_db(seed)
+        self.shortener = UrlShortener(self.iniValues.shortener,
+                                      self.iniValues.url_workers,
+                                      self.iniValues.url_batch_size,
+                                      self.iniValues.url_retries)
+        self.buffer = WriteBuffer(db, self.iniValues.batch_size, self.shortener)
+        self.ids = self.service.id_registries[seed]
+        self.scheduler = Scheduler(db, self.iniValues.hops,
+                                   self.iniValues.priority,
+                                   [session.name for session in self.Sessions])
+        self.urls = set(row[0] for row in db.executesql(
+            'SELECT url FROM o_urls;'))
+        # URLs left without short form by an interrupted scrape
+        for row in db.executesql('SELECT url FROM o_urls WHERE short IS NULL;'):
+            short = self.shortener.shorten(row[0])
+            if short:
+                self.buffer.set_short(row[0], short)
+        # log start of scraping session
+        self.log(db,
+                 "Information",
+                 "Start " + action + " for " + seed)
+        for session in self.Sessions:
+            self.log(db,
+                     "Information",
+                     "Session " + session.name +
+                     " api_id " + str(session.api_id) +
+                     " wait_until " + str(
+                         datetime.fromtimestamp(
+                             session.wait_until)))
+        return db
+
+    def close_seed(self, db):
+        # wait for the URLs still being shortened
+        self.buffer.flush(wait=True)
+        self.buffer.shorts.extend(self.shortener.close())
+        self.buffer.flush()
+
+        # update node types and names
+        self.update_nodes(db)
+
+        self.service.entity_cache.save()
+        print(self.service.entity_cache.stats())
+        self.log(db, "Information", self.service.entity_cache.stats())
+        print(self.service.negative_cache.stats())
+        self.log(db, "Information", self.service.negative_cache.stats())
+        table_data = self.service.pool.stats()
+        print(tabulate(table_data, headers='firstrow', tablefmt='fancy_grid'))
+        for row in table_data[1:]:
+            self.log(db, "Information", ", ".join(
+                header + ": " + value for header, value in zip(table_data[0], row)))
+        self.log(db,
+                 "Information",
+                 "Closing scraping sesion")
+
+        # close db
+        if db:
+            db.commit()
+            db.close()
+        self.buffer = None
+        self.ids = None
+        self.service.id_registries.clear()
+        self.urls = None
+        self.shortener = None
+        self.scheduler = None
+
+    async def scrape(self):
+        for seed in list(self.iniValues.seeds):
+            db = self.open_seed(seed, "scraping")
+
+            if db(db.t_ids).isempty():
+                myResult = await self.process_entity(db, seed, 0, None, None, None)
+            else:
+                row = db(db.t_ids).select().first()
+                myResult = row.scrape_state
+            if not myResult:
+                err_str = "Could not find an entry for " + \
+                    seed + " with a matching ID!"
+                self.log(db,
+                         "Error",
+                         err_str)
+                raise ScrapeError(err_str)
+
+            print('Seed ', seed, ' ', str(myResult))
+
+            try:
+                await self.run_schedule(db)
+            finally:
+                self.buffer.flush()
+
+            all_finished = True
+            for row in db(db.t_ids).select():
+                if row.scrape_state != 'Finished' and \
+                        row.hop < self.iniValues.hops:
+                    all_finished = False
+            if all_finished:
+                self.service.remove_seed(seed)
+                self.log(db,
+                         "Information",
+                         "Finished Scraping for " + seed)
+
+            self.close_seed(db)
+
+    async def refresh(self, seed):
+        # fetch only new messages of finished entities, newly found
+        # entities are scraped up to the configured hops
+        db = self.open_seed(seed, "refresh")
+        try:
+            # resume interrupted scraping first
+            await self.run_schedule(db)
+            for hop in range(0, self.iniValues.hops):
+                await self.refresh_hop(db, hop)
+            # scrape the entities found in the new messages
+            await self.run_schedule(db)
+        finally:
+            self.buffer.flush()
+
+        self.log(db,
+                 "Information",
+                 "Finished refresh for " + seed)
+        self.close_seed(db)
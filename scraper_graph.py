@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+from array import array
+
+import numpy as np
+
+# [Analyze] setting -> kind of the nodes it includes
+KIND_SETTINGS = [
+    ('contacts', 'contact'),
+    ('bots', 'bot'),
+    ('chats', 'chat'),
+    ('channels', 'channel'),
+    ('telegram_ids', 'telegram_id'),
+    ('urls', 'url'),
+    ('o_entities', 'o_entity'),
+    ('keys', 'keyword'),
+]
+
+
+def selected_kinds(iniValues):
+    # kinds of the mentioned nodes included by the [Analyze] section
+    return [kind for setting, kind in KIND_SETTINGS
+            if getattr(iniValues, setting)]
+
+
+def gml_string(text):
+    # GML strings are ASCII, other characters as HTML entities like
+    # networkx writes them
+    return '"' + ''.join(
+        char if 32 <= ord(char) < 127 and char not in '"&'
+        else '&#' + str(ord(char)) + ';' for char in str(text)) + '"'
+
+
+class SeedGraph():
+    """Directed multigraph of the mentions of a seed, kept in compact arrays.
+
+    The edges are streamed from the database in batches of fetch_size rows
+    with only the columns needed, the kinds filter of the [Analyze] section
+    is part of the WHERE clause. Nodes are numbered 0..n-1 in the order of
+    their node id, every edge is one entry in the sources, targets and hops
+    arrays and the labels and kinds of the nodes are loaded for the nodes in
+    the graph only. Weighted graphs merge parallel edges, their weight is
+    the number of mentions, so networkit and networkx graphs are built from
+    the arrays without reading the database again.
+    """
+    fetch_size = 100000
+
+    def __init__(self, connection, kinds, name=''):
+        self.connection = connection
+        self.kinds = list(kinds)
+        self.name = name
+        sources = array('q')
+        targets = array('q')
+        hops = array('q')
+        cursor = connection.execute(
+            'SELECT edges.source, edges.target, COALESCE(edges.hop, -1) '
+            'FROM edges JOIN nodes ON nodes.id = edges.target '
+            'WHERE nodes.kind IN (' + ', '.join('?' for kind in self.kinds) +
+            ');', self.kinds)
+        rows = cursor.fetchmany(self.fetch_size)
+        while rows:
+            batch = list(zip(*rows))
+            sources.extend(batch[0])
+            targets.extend(batch[1])
+            hops.extend(batch[2])
+            rows = cursor.fetchmany(self.fetch_size)
+        sources = np.frombuffer(sources, dtype=np.int64)
+        targets = np.frombuffer(targets, dtype=np.int64)
+
+        # node ids -> 0..n-1
+        self.node_ids, inverse = np.unique(
+            np.concatenate([sources, targets]), return_inverse=True)
+        self.sources = inverse[:len(sources)].astype(np.int32)
+        self.targets = inverse[len(sources):].astype(np.int32)
+        self.hops = np.frombuffer(hops, dtype=np.int64).astype(np.int16)
+
+        self.labels = [''] * len(self.node_ids)
+        self.types = ['unknown'] * len(self.node_ids)
+        cursor = connection.execute('SELECT id, kind, label FROM nodes;')
+        rows = cursor.fetchmany(self.fetch_size)
+        while rows:
+            ids = np.fromiter((row[0] for row in rows), dtype=np.int64,
+                              count=len(rows))
+            positions = np.searchsorted(self.node_ids, ids)
+            positions[positions == len(self.node_ids)] = 0
+            found = np.flatnonzero(self.node_ids[positions] == ids) \
+                if len(self.node_ids) else []
+            for i in found:
+                node = positions[i]
+                self.types[node] = rows[i][1]
+                self.labels[node] = str(rows[i][2] or rows[i][1])
+            rows = cursor.fetchmany(self.fetch_size)
+
+    def __getstate__(self):
+        # for the analysis cache, the connection is set again when loaded
+        state = self.__dict__.copy()
+        state['connection'] = None
+        return state
+
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        return len(self.sources)
+
+    def density(self):
+        # like nx.density of a directed multigraph
+        nodes = self.number_of_nodes()
+        if nodes < 2:
+            return 0.0
+        return self.number_of_edges() / (nodes * (nodes - 1))
+
+    def degrees(self):
+        # mentions of and by every node, like the degree of the multigraph
+        nodes = self.number_of_nodes()
+        return np.bincount(self.sources, minlength=nodes) + \
+            np.bincount(self.targets, minlength=nodes)
+
+    def neighbors(self):
+        # distinct neighbors of every node in the undirected graph, like the
+        # DegreeCentrality of the networkit graph
+        sources, targets, weights = self.weighted_edges()
+        edges = sources != targets
+        nodes = self.number_of_nodes()
+        return np.bincount(sources[edges], minlength=nodes) + \
+            np.bincount(targets[edges], minlength=nodes)
+
+    def weighted_edges(self, directed=False, max_hop=None, nodes=None):
+        # (sources, targets, weights) with parallel edges merged, edges of
+        # undirected graphs from the lower to the higher node, only up to
+        # max_hop and between nodes if given
+        sources = self.sources
+        targets = self.targets
+        if max_hop is not None:
+            mask = self.hops <= max_hop
+            sources = sources[mask]
+            targets = targets[mask]
+        if nodes is not None:
+            nodes = np.fromiter(nodes, dtype=np.int64)
+            mask = np.isin(sources, nodes) & np.isin(targets, nodes)
+            sources = sources[mask]
+            targets = targets[mask]
+        if not directed:
+            sources, targets = np.minimum(sources, targets), \
+                np.maximum(sources, targets)
+        nodes = max(self.number_of_nodes(), 1)
+        keys, weights = np.unique(
+            sources.astype(np.int64) * nodes + targets, return_counts=True)
+        return keys // nodes, keys % nodes, weights.astype(np.float64)
+
+    def networkit(self, directed=False):
+        import networkit as nk
+
+        sources, targets, weights = self.weighted_edges(directed)
+        graph = nk.Graph(self.number_of_nodes(), weighted=True,
+                         directed=directed)
+        if hasattr(graph, 'addEdges'):
+            graph.addEdges((weights, (sources, targets)))
+        else:
+            for u, v, w in zip(sources.tolist(), targets.tolist(),
+                               weights.tolist()):
+                graph.addEdge(u, v, w)
+        graph.indexEdges()
+        return graph
+
+    def networkx(self, directed=False, max_hop=None, nodes=None):
+        # only for what networkit has no equivalent of, like drawing
+        import networkx as nx
+
+        sources, targets, weights = self.weighted_edges(directed, max_hop,
+                                                        nodes)
+        graph = nx.DiGraph(name=self.name) if directed \
+            else nx.Graph(name=self.name)
+        if nodes is None:
+            nodes = np.unique(np.concatenate([sources, targets])).tolist()
+        graph.add_nodes_from((node, {'type': self.types[node],
+                                     'label': self.labels[node]})
+                             for node in nodes)
+        graph.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(),
+                                          weights.tolist()))
+        return graph
+
+    def write_gml(self, file):
+        # streams the edges with their message, hop and timestamp into a
+        # GML file, like nx.write_gml of the multigraph
+        with open(file, 'w', encoding='ascii') as gml:
+            gml.write('graph [\n  directed 1\n  multigraph 1\n')
+            gml.write('  name ' + gml_string(self.name) + '\n')
+            for node in range(self.number_of_nodes()):
+                gml.write('  node [\n    id ' + str(node) +
+                          '\n    label ' + gml_string(self.labels[node]) +
+                          '\n    type ' + gml_string(self.types[node]) +
+                          '\n  ]\n')
+            cursor = self.connection.execute(
+                'SELECT edges.source, edges.target, edges.message_id, '
+                'edges.hop, edges.timestamp '
+                'FROM edges JOIN nodes ON nodes.id = edges.target '
+                'WHERE nodes.kind IN (' +
+                ', '.join('?' for kind in self.kinds) + ');', self.kinds)
+            rows = cursor.fetchmany(self.fetch_size)
+            while rows:
+                batch = list(zip(*rows))
+                sources = np.searchsorted(self.node_ids, batch[0]).tolist()
+                targets = np.searchsorted(self.node_ids, batch[1]).tolist()
+                for source, target, row in zip(sources, targets, rows):
+                    gml.write('  edge [\n    source ' + str(source) +
+                              '\n    target ' + str(target))
+                    for key, value in zip(['message_id', 'hop', 'timestamp'],
+                                          row[2:]):
+                        if value is not None:
+                            gml.write('\n    ' + key + ' ' + str(value))
+                    gml.write('\n  ]\n')
+                rows = cursor.fetchmany(self.fetch_size)
+            gml.write(']\n')
@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+import os
+
+from scraper_db import update_nodes
+from scraper_model import ScrapeError
+from tabulate import tabulate
+
+# table -> column with the Telegram ID of the entity a row belongs to, the
+# rows of an entity are taken from the seed whose t_ids row is kept
+ENTITY_TABLES = [
+    ('t_ids', 't_id'),
+    ('t_chats', 'chat_id'),
+    ('t_contacts', 'contact_id'),
+    ('t_messages', 'entity_id'),
+]
+
+# table -> column, rows are the same if the column is, the kind of the
+# row is kept from one seed
+KIND_TABLES = [
+    ('t_urls', 'url'),
+    ('o_entities', 'entity'),
+]
+
+
+class Merger():
+    """Merges the databases of several seeds into the database of a new seed.
+
+    Every seed database is attached to the new database in turn and copied
+    with INSERT ... SELECT, the unique indexes of the new database decide
+    which rows are already there. Entities scraped by more than one seed
+    are resolved by the conflicts policy:
+
+    newer       -- the t_ids row with the later last_check is kept
+    first       -- rows of seeds listed earlier are kept
+    last        -- rows of seeds listed later are kept
+    interactive -- every conflicting row is shown and has to be chosen
+
+    The chats, contacts and messages of an entity come from the seed whose
+    t_ids row was kept. Nodes are the same if their key is, edges are only
+    omitted if one with the same nodes, message, timestamp and hop is
+    already in the new database. Only needs the databases of
+    the ScraperService, so merging does not load Telethon or any of the
+    analysis libraries.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.conflicts = service.iniValues.merge_conflicts
+        if self.conflicts not in ['newer', 'first', 'last', 'interactive']:
+            print('Unknown merge_conflicts ' + str(self.conflicts) +
+                  ', keeping newer rows.')
+            self.conflicts = 'newer'
+
+    def merge(self, seeds, newName):
+        if len(set(seeds)) < 2:
+            raise ScrapeError('At least two different datasets are needed to merge!')
+        print("Merging " + ", ".join(seeds))
+        print("to new Database " + newName)
+        files = []
+        for seed in seeds:
+            # migrates and indexes older databases
+            db = self.service.open_db(seed)
+            db.close()
+            files.append(os.path.join('data', seed, seed + '_scrape.sqlite'))
+        newDb = self.service.connect_db(newName)
+        connection = newDb._adapter.connection
+        # last_check of the newest entity merged so far
+        self.newest = ''
+        for seed, file in zip(seeds, files):
+            print("Merging " + seed)
+            connection.execute('ATTACH DATABASE ? AS src;', (file,))
+            try:
+                self.merge_seed(connection, seed)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.execute('DETACH DATABASE src;')
+
+        # kinds and labels of the nodes from the merged contacts and chats
+        update_nodes(connection, False)
+        self.service.log(newDb, "Information", "Merged " + ", ".join(seeds) +
+                         ", conflicts: " + self.conflicts)
+        newDb.close()
+
+    def columns(self, connection, table):
+        # columns of table in both databases, without the pydal id
+        main = [row[1] for row in connection.execute(
+            'PRAGMA main.table_info(' + table + ');')]
+        src = set(row[1] for row in connection.execute(
+            'PRAGMA src.table_info(' + table + ');'))
+        return [column for column in main if column in src and column != 'id']
+
+    def choose(self, connection, table, column, value, seed):
+        # shows the merged and the new row, True if the new one is kept
+        columns = self.columns(connection, table)
+        old = connection.execute(
+            'SELECT ' + ', '.join(columns) + ' FROM main.' + table +
+            ' WHERE ' + column + ' = ?;', (value,)).fetchone()
+        new = connection.execute(
+            'SELECT ' + ', '.join(columns) + ' FROM src.' + table +
+            ' WHERE ' + column + ' = ?;', (value,)).fetchone()
+        if old == new:
+            return False
+        print("Conflicting entries found in tables " + table + ":")
+        table_data = [['field', "1: merged", "2: Seed " + seed]]
+        for field, old_value, new_value in zip(columns, old, new):
+            table_data.append([field, str(old_value), str(new_value)])
+        print(tabulate(
+            table_data,
+            headers='firstrow',
+            tablefmt='fancy_grid',
+            maxcolwidths=[None, 20, 20]))
+        while True:
+            userInput = input("Enter number of entry you want to keep (1/2): ")
+            if userInput.isdigit() and int(userInput) in [1, 2]:
+                return int(userInput) == 2
+            print("Invalid selection, enter 1 or 2!")
+
+    def merge_seed(self, connection, seed):
+        tables = set(row[0] for row in connection.execute(
+            "SELECT name FROM src.sqlite_master WHERE type = 'table';"))
+
+        # entities of the new seed that replace the merged ones
+        connection.execute('DROP TABLE IF EXISTS temp.replaced;')
+        connection.execute('CREATE TEMP TABLE replaced (t_id INTEGER PRIMARY KEY);')
+        conflict = ('FROM src.t_ids AS new JOIN main.t_ids AS old '
+                    'ON old.t_id = new.t_id')
+        if self.conflicts == 'last':
+            connection.execute('INSERT OR IGNORE INTO temp.replaced '
+                               'SELECT new.t_id ' + conflict + ';')
+        elif self.conflicts == 'newer':
+            connection.execute(
+                "INSERT OR IGNORE INTO temp.replaced SELECT new.t_id " +
+                conflict + " WHERE COALESCE(new.last_check, '') > "
+                "COALESCE(old.last_check, '');")
+        elif self.conflicts == 'interactive':
+            for row in connection.execute(
+                    'SELECT new.t_id ' + conflict + ';').fetchall():
+                if self.choose(connection, 't_ids', 't_id', row[0], seed):
+                    connection.execute('INSERT OR IGNORE INTO temp.replaced '
+                                       'VALUES (?);', (row[0],))
+
+        for table, column in ENTITY_TABLES:
+            if table not in tables:
+                continue
+            columns = ', '.join(self.columns(connection, table))
+            connection.execute(
+                'INSERT OR REPLACE INTO main.' + table + ' (' + columns + ') '
+                'SELECT ' + columns + ' FROM src.' + table + ' WHERE ' +
+                column + ' IN (SELECT t_id FROM temp.replaced);')
+            connection.execute(
+                'INSERT OR IGNORE INTO main.' + table + ' (' + columns + ') '
+                'SELECT ' + columns + ' FROM src.' + table + ';')
+        connection.execute('DROP TABLE temp.replaced;')
+
+        # t_urls and o_entities have no unique index and no last_check,
+        # with newer the seed with the later scrape wins
+        newest = connection.execute(
+            'SELECT MAX(last_check) FROM src.t_ids;').fetchone()[0] or ''
+        for table, column in KIND_TABLES:
+            if table not in tables:
+                continue
+            if self.conflicts == 'last' or \
+                    (self.conflicts == 'newer' and newest > self.newest):
+                connection.execute(
+                    'UPDATE main.' + table + ' SET kind = (SELECT kind FROM '
+                    'src.' + table + ' AS new WHERE new.' + column + ' = main.' +
+                    table + '.' + column + ') WHERE ' + column +
+                    ' IN (SELECT ' + column + ' FROM src.' + table + ');')
+            elif self.conflicts == 'interactive':
+                for row in connection.execute(
+                        'SELECT new.' + column + ' FROM src.' + table +
+                        ' AS new JOIN main.' + table + ' AS old ON old.' +
+                        column + ' = new.' + column +
+                        ' WHERE old.kind IS NOT new.kind;').fetchall():
+                    if self.choose(connection, table, column, row[0], seed):
+                        connection.execute(
+                            'UPDATE main.' + table + ' SET kind = (SELECT kind '
+                            'FROM src.' + table + ' WHERE ' + column + ' = ?) '
+                            'WHERE ' + column + ' = ?;', (row[0], row[0]))
+            connection.execute(
+                'INSERT INTO main.' + table + ' (' + column + ', kind) '
+                'SELECT DISTINCT ' + column + ', kind FROM src.' + table +
+                ' WHERE ' + column + ' NOT IN (SELECT ' + column +
+                ' FROM main.' + table + ');')
+        self.newest = max(self.newest, newest)
+
+        # URLs, a short form replaces a missing one
+        connection.execute(
+            'INSERT OR IGNORE INTO main.o_urls (url, short) '
+            'SELECT url, short FROM src.o_urls;')
+        connection.execute(
+            'UPDATE main.o_urls SET short = (SELECT short FROM src.o_urls AS new '
+            'WHERE new.url = main.o_urls.url) WHERE short IS NULL;')
+
+        # keyword hits of messages not merged yet
+        if 'keyword_hits' in tables:
+            connection.execute(
+                'INSERT INTO main.keyword_hits '
+                '(entity_id, message_id, keyword, start_pos, end_pos) '
+                'SELECT entity_id, message_id, keyword, start_pos, end_pos '
+                'FROM src.keyword_hits AS new WHERE NOT EXISTS ('
+                'SELECT 1 FROM main.keyword_hits AS old '
+                'WHERE old.entity_id = new.entity_id '
+                'AND old.message_id = new.message_id '
+                'AND old.keyword = new.keyword '
+                'AND old.start_pos IS new.start_pos);')
+
+        # nodes by key, edges with the ids of the new database. message_id
+        # is only unique within a chat and the chat of an edge is not
+        # stored, so two mentions are taken as the same edge only if their
+        # timestamp and hop match as well
+        connection.execute(
+            'INSERT OR IGNORE INTO main.nodes (kind, key, label) '
+            'SELECT kind, key, label FROM src.nodes ORDER BY id;')
+        connection.execute(
+            'INSERT INTO main.edges (source, target, message_id, timestamp, hop) '
+            'SELECT source_node.id, target_node.id, new.message_id, '
+            'new.timestamp, new.hop FROM src.edges AS new '
+            'JOIN src.nodes AS source_key ON source_key.id = new.source '
+            'JOIN main.nodes AS source_node ON source_node.key = source_key.key '
+            'JOIN src.nodes AS target_key ON target_key.id = new.target '
+            'JOIN main.nodes AS target_node ON target_node.key = target_key.key '
+            'WHERE NOT EXISTS (SELECT 1 FROM main.edges AS old '
+            'WHERE old.source = source_node.id AND old.target = target_node.id '
+            'AND old.message_id IS new.message_id '
+            'AND old.timestamp IS new.timestamp AND old.hop IS new.hop);')
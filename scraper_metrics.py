@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+import math
+
+import networkit as nk
+
+
+class GraphMetrics():
+    """Connectedness, distances, clustering and centralities of a graph.
+
+    precision is one of
+    exact       -- every metric is computed exactly, distances and
+                   centralities take O(n*m)
+    approximate -- sampling and sketch based estimators, their error bound
+                   is returned with the value:
+                   diameter       lower and upper bound, at most epsilon
+                                  relative apart
+                   transitivity   epsilon, from wedge samples by the
+                                  Hoeffding bound
+                   betweenness    epsilon, additive
+                   closeness      epsilon, relative, from samples nodes
+                   eff. diameter  Flajolet-Martin sketches of the ANF
+                                  algorithm, relative error of the number
+                                  of node pairs 0.78 / sqrt(sketches)
+
+    Bounds hold with the probability confidence. Distances count hops,
+    the weights of the graph are the number of mentions and only used by
+    PageRank and the communities.
+    """
+    confidence = 0.95
+    sketches = 64
+
+    def __init__(self, graph, precision='exact', epsilon=0.01, samples=1000):
+        if precision not in ['exact', 'approximate']:
+            print('Unknown precision ' + str(precision) +
+                  ', computing exact metrics.')
+            precision = 'exact'
+        self.graph = graph
+        self.precision = precision
+        self.approximate = precision == 'approximate'
+        self.epsilon = epsilon
+        self.samples = samples
+        self.component = None
+        # node of the graph of every node of the component
+        self.nodes = []
+
+    def components(self):
+        # (connected, largest component), the metrics below are computed on
+        # the component without weights, renumbered to 0..n-1 because
+        # some algorithms do not skip the nodes of the other components
+        components = nk.components.ConnectedComponents(self.graph)
+        components.run()
+        connected = components.numberOfComponents() == 1
+        if connected:
+            component = self.graph
+            self.nodes = list(range(self.graph.numberOfNodes()))
+        else:
+            component = nk.components.ConnectedComponents.\
+                extractLargestConnectedComponent(self.graph, False)
+            ids = nk.graphtools.getContinuousNodeIds(component)
+            self.nodes = [0] * len(ids)
+            for node, id in ids.items():
+                self.nodes[id] = node
+            component = nk.graphtools.getCompactedGraph(component, ids)
+        self.component = nk.graphtools.toUnweighted(component)
+        return connected, component
+
+    def diameter(self):
+        # (lower, upper), the same if exact
+        if self.approximate:
+            diameter = nk.distance.Diameter(
+                self.component, algo=nk.distance.DiameterAlgo.EstimatedRange,
+                error=self.epsilon)
+        else:
+            diameter = nk.distance.Diameter(
+                self.component, algo=nk.distance.DiameterAlgo.Exact)
+        diameter.run()
+        lower, upper = diameter.getDiameter()
+        return lower, max(lower, upper)
+
+    def effective_diameter(self):
+        # (hops to reach 90% of the other nodes, relative error of the
+        # number of node pairs reached)
+        if self.approximate:
+            diameter = nk.distance.EffectiveDiameterApproximation(
+                self.component, 0.9, self.sketches)
+            error = 0.78 / math.sqrt(self.sketches)
+        else:
+            diameter = nk.distance.EffectiveDiameter(self.component, 0.9)
+            error = None
+        diameter.run()
+        return diameter.getEffectiveDiameter(), error
+
+    def transitivity(self):
+        # (global clustering coefficient, error)
+        if self.approximate:
+            trials = math.ceil(math.log(2 / (1 - self.confidence)) /
+                               (2 * self.epsilon ** 2))
+            return nk.globals.ClusteringCoefficient.approxGlobal(
+                self.component, trials), self.epsilon
+        return nk.globals.ClusteringCoefficient.exactGlobal(
+            self.component), None
+
+    def betweenness(self, top=10):
+        # [(node, normalized betweenness, error)]
+        if self.approximate:
+            betweenness = nk.centrality.ApproxBetweenness(
+                self.component, epsilon=self.epsilon,
+                delta=1 - self.confidence)
+            betweenness.run()
+            # normalized by n * (n - 1) pairs instead of (n - 1) * (n - 2)
+            nodes = self.component.numberOfNodes()
+            scale = nodes / (nodes - 2) if nodes > 2 else 1
+            return [(self.nodes[node], score * scale, self.epsilon * scale)
+                    for node, score in betweenness.ranking()[:top]]
+        betweenness = nk.centrality.Betweenness(self.component, normalized=True)
+        betweenness.run()
+        return [(self.nodes[node], score, None)
+                for node, score in betweenness.ranking()[:top]]
+
+    def closeness(self, top=10):
+        # [(node, normalized closeness, error)]
+        if self.approximate and \
+                self.samples < self.component.numberOfNodes():
+            closeness = nk.centrality.ApproxCloseness(
+                self.component, self.samples, self.epsilon, True)
+            closeness.run()
+            return [(self.nodes[node], score, score * self.epsilon)
+                    for node, score in closeness.ranking()[:top]]
+        closeness = nk.centrality.Closeness(
+            self.component, True, nk.centrality.ClosenessVariant.Generalized)
+        closeness.run()
+        return [(self.nodes[node], score, None)
+                for node, score in closeness.ranking()[:top]]
+
+    def pagerank(self, directed, top=10):
+        # [(node, score)] of a directed graph, dangling nodes and scores
+        # summing up to 1 like nx.pagerank
+        pagerank = nk.centrality.PageRank(
+            directed,
+            damp=0.85,
+            tol=1e-9,
+            distributeSinks=nk.centrality.SinkHandling.DistributeSinks)
+        pagerank.run()
+        total = sum(pagerank.scores())
+        return [(node, score / total) for node, score in pagerank.ranking()[:top]]
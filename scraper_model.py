@@ -21,9 +21,16 @@ class RequestState(Enum):
 
 class RequestError(Exception):
     """Raised when Requests get blocked or failed"""
-    def __init__(self, message):
+    def __init__(self, message, state=RequestState.Failed):
+        self.state = state
         print(message)
 
+class Request():
+    """State of one request, kept by the coroutine that makes it, the
+    sessions are shared by several of them"""
+    def __init__(self):
+        self.state = RequestState.Idle
+
 class ScrapeState(Enum):
     Init = 0 # initialized
     AnalyzingEntities = 1
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+import re
+
+from collections import deque
+
+# URLs with or without scheme, like www.example.org or example.org/path
+URL_PATTERN = r"\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.]" \
+              r"[a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]" \
+              r"+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|" \
+              r"[^\s`!()\[\]{};:'\".,<>?    «»“”‘’]))"
+USERNAME_PATTERN = r"\B@\w{5,32}\b"
+WORD_REGEX = re.compile(r"\w+")
+
+# URLs and usernames in one pass, a username inside of an URL belongs to
+# the URL
+TEXT_REGEX = re.compile(r"(?P<url>" + URL_PATTERN + r")|(?P<username>" +
+                        USERNAME_PATTERN + r")", flags=re.IGNORECASE)
+TELEGRAM_REGEX = re.compile(r"^(https:\/\/)?(t|telegram)\.(me|org|dog)",
+                            flags=re.IGNORECASE)
+INVITE_REGEX = re.compile(
+    r"(?:t|telegram)\.(?:me|org|dog)\/(joinchat\/|\+){1}([\w-]+)",
+    flags=re.IGNORECASE)
+
+
+class KeywordMatcher():
+    """Finds all occurrences of a list of keywords, ignoring case.
+
+    mode is one of
+    substring -- keywords are found anywhere, also inside of words
+    word      -- keywords and phrases only match whole words
+    stem      -- like word, but words are compared by their Porter stem,
+                 so "scam" also matches "scams" and "scammed", but not
+                 "scammers", whose stem is "scammer"
+
+    All keywords are compiled into one Aho-Corasick automaton, which steps
+    through the characters of the text in substring mode and through its
+    words otherwise. For short keyword lists str.find on the lowered text
+    is faster than stepping through the characters in Python, so in
+    substring mode the automaton is only used from automaton_keywords
+    keywords on. Offsets of word and stem matches refer to the text,
+    offsets of substring matches to the lowered text.
+    """
+    automaton_keywords = 100
+
+    def __init__(self, keywords, mode='substring'):
+        if mode not in ['substring', 'word', 'stem']:
+            print('Unknown keyword_match ' + str(mode) +
+                  ', using substring matching.')
+            mode = 'substring'
+        self.mode = mode
+        self.stems = {}
+        self.stemmer = None
+        if self.mode == 'stem':
+            from nltk.stem import PorterStemmer
+            self.stemmer = PorterStemmer()
+        # keyword key -> keywords as written in scraper.ini, the key is the
+        # lowered keyword in substring mode and a tuple of words otherwise
+        self.keywords = {}
+        for keyword in keywords:
+            if self.mode == 'substring':
+                key = keyword.lower()
+            else:
+                key = tuple(self.normalize(word)
+                            for word in WORD_REGEX.findall(keyword))
+            if key:
+                self.keywords.setdefault(key, []).append(keyword)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for key in self.keywords:
+            self.add(key)
+        self.link()
+
+    def normalize(self, word):
+        word = word.lower()
+        if self.stemmer is None:
+            return word
+        stem = self.stems.get(word)
+        if stem is None:
+            stem = self.stemmer.stem(word)
+            self.stems[word] = stem
+        return stem
+
+    def add(self, key):
+        state = 0
+        for unit in key:
+            if unit not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][unit] = len(self.goto) - 1
+            state = self.goto[state][unit]
+        self.output[state].append(key)
+
+    def link(self):
+        # failure links in breadth first order, outputs of the failure
+        # state are copied, so every state knows all keys ending there
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for unit, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and unit not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(unit, 0)
+                self.fail[next_state] = fail if fail != next_state else 0
+                self.output[next_state] = self.output[next_state] + \
+                    self.output[self.fail[next_state]]
+
+    def walk(self, units):
+        # (key, index of the first unit, index of the last unit) of all
+        # keys found in a sequence of characters or words
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for position, unit in enumerate(units):
+            while state and unit not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(unit, 0)
+            if output[state]:
+                for key in output[state]:
+                    yield key, position + 1 - len(key), position
+
+    def find(self, text):
+        # returns (keyword, start, end) for every occurrence
+        if not self.keywords:
+            return []
+        hits = []
+        if self.mode != 'substring':
+            words = list(WORD_REGEX.finditer(text))
+            units = [self.normalize(word.group()) for word in words]
+            for key, first, last in self.walk(units):
+                hits.append((key, words[first].start(), words[last].end()))
+        elif len(self.keywords) < self.automaton_keywords:
+            lowered = text.lower()
+            for key in self.keywords:
+                start = lowered.find(key)
+                while start >= 0:
+                    hits.append((key, start, start + len(key)))
+                    start = lowered.find(key, start + 1)
+        else:
+            for key, first, last in self.walk(text.lower()):
+                hits.append((key, first, last + 1))
+        hits.sort(key=lambda hit: hit[1])
+        return [(original, start, end)
+                for key, start, end in hits
+                for original in self.keywords[key]]
+
+
+class ScanResult():
+
+    def __init__(self):
+        self.usernames = []
+        self.urls = []
+        # Telegram URLs and the hash of the invitation links among them
+        self.telegram_urls = set()
+        self.invites = {}
+        # (keyword, start, end)
+        self.keywords = []
+
+
+class TextScanner():
+    """Extracts usernames, URLs, invitation links and keywords of a message.
+
+    The text is scanned once by a precompiled pattern for usernames and
+    URLs and once by the keyword matcher. Only the URLs found are checked
+    for Telegram and invitation links.
+    """
+
+    def __init__(self, keywords, keyword_match='substring'):
+        self.matcher = KeywordMatcher(keywords, keyword_match)
+
+    def scan(self, text):
+        result = ScanResult()
+        if not text:
+            return result
+        result.keywords = self.matcher.find(text)
+        # usernames and URLs never contain whitespace and need an @, a dot
+        # or a scheme, only the words that have one of them are scanned
+        words = ' '.join(word for word in text.split()
+                         if '@' in word or '.' in word or ':' in word)
+        for match in TEXT_REGEX.finditer(words):
+            url = match.group('url')
+            if url:
+                result.urls.append(url)
+                if TELEGRAM_REGEX.search(url):
+                    result.telegram_urls.add(url)
+                    invite = INVITE_REGEX.search(url)
+                    if invite:
+                        result.invites[url] = invite.group(2)
+            else:
+                result.usernames.append(match.group('username'))
+        return result
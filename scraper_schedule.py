@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+import asyncio
+import heapq
+import time
+
+from itertools import count
+
+# scrape_state values of t_ids rows which still have to be scraped
+OPEN_STATES = ['Identified', 'FloodWait', 'TakeoutWait', 'Scraping']
+
+# rank of the entity types for priority = type, groups first because their
+# senders lead to the most new entities
+TYPE_RANKS = {'chat': 2, 'channel': 1, 'contact': 0}
+
+
+class Scheduler():
+    """Persistent work queue of the entities of a seed that still have to be scraped.
+
+    Every entity found below the hops limit gets a row in the schedule table
+    as soon as it is saved, so sessions can pick it up while the entities of
+    earlier hops are still being scraped. The rows are kept in one heap per
+    session, ordered by priority:
+
+    hop      -- lower hops first, like scraping hop by hop
+    mentions -- entities mentioned most often first
+    type     -- chats, then channels, then contacts
+
+    Entities that could not be scraped are tried again after
+    next_eligible_at, entities that failed max_attempts times are dropped.
+    A session whose own heap is empty takes over the entities of sessions
+    that are FloodWait blocked or not configured any more.
+    """
+    max_attempts = 3
+    retry_delay = 60
+
+    def __init__(self, db, hops, priority, session_names):
+        if priority not in ['hop', 'mentions', 'type']:
+            print('Unknown priority ' + str(priority) +
+                  ', scheduling by hop.')
+            priority = 'hop'
+        self.db = db
+        self.connection = db._adapter.connection
+        self.hops = hops
+        self.priority = priority
+        self.active = set(session_names)
+        self.heaps = dict((name, []) for name in session_names)
+        # t_id -> [t_session_name, hop, type_rank, attempts, next_eligible_at]
+        self.entries = {}
+        self.mentions = {}
+        self.changed = set()
+        self.claimed = set()
+        self.delayed = []
+        self.order = count()
+        self.busy = 0
+        self.event = asyncio.Event()
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS schedule (
+            t_id INTEGER PRIMARY KEY,
+            t_session_name TEXT,
+            hop INTEGER,
+            priority INTEGER,
+            mentions INTEGER,
+            attempts INTEGER,
+            next_eligible_at REAL);''')
+        # also schedules the open entities of databases scraped before the
+        # schedule table existed, up to the last hop that is scraped
+        self.connection.execute(
+            "INSERT OR IGNORE INTO schedule "
+            "SELECT t_id, t_session_name, hop, "
+            "CASE t_type WHEN 'chat' THEN 2 WHEN 'channel' THEN 1 ELSE 0 END, "
+            "0, 0, 0 FROM t_ids WHERE scrape_state IN (" +
+            ", ".join("'" + state + "'" for state in OPEN_STATES) + ") "
+            "AND hop < ?;", (self.hops,))
+        self.db.commit()
+        for t_id, t_session_name, hop, rank, mentions, attempts, eligible in \
+                self.connection.execute('SELECT * FROM schedule;'):
+            if hop < self.hops:
+                self.mentions[t_id] = mentions
+                self.entries[t_id] = [t_session_name, hop, rank, attempts,
+                                      eligible]
+                self.push(t_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, t_id):
+        t_session_name, hop, rank, attempts, eligible = self.entries[t_id]
+        if self.priority == 'mentions':
+            return (-self.mentions.get(t_id, 0), hop)
+        elif self.priority == 'type':
+            return (-rank, hop)
+        return (hop,)
+
+    def push(self, t_id):
+        entry = self.entries[t_id]
+        if entry[4] > time.time():
+            self.delayed.append(t_id)
+            return
+        heap = self.heaps.setdefault(entry[0], [])
+        heapq.heappush(heap, (self.key(t_id), next(self.order), t_id))
+
+    def add(self, t_id, t_session_name, t_type, hop):
+        if hop >= self.hops or t_id in self.entries:
+            return
+        rank = TYPE_RANKS.get(t_type, 0)
+        self.entries[t_id] = [t_session_name, hop, rank, 0, 0]
+        self.connection.execute(
+            'INSERT OR REPLACE INTO schedule VALUES (?, ?, ?, ?, ?, 0, 0);',
+            (t_id, t_session_name, hop, rank, self.mentions.get(t_id, 0)))
+        self.push(t_id)
+        self.event.set()
+
+    def mention(self, t_id):
+        self.mentions[t_id] = self.mentions.get(t_id, 0) + 1
+        if t_id in self.entries:
+            self.changed.add(t_id)
+
+    def reorder(self):
+        # give entities mentioned again their new priority, the old heap
+        # item is skipped when it comes up
+        if self.priority == 'mentions':
+            for t_id in self.changed:
+                if t_id in self.entries and t_id not in self.claimed:
+                    self.push(t_id)
+        self.connection.executemany(
+            'UPDATE schedule SET mentions = ? WHERE t_id = ?;',
+            [(self.mentions[t_id], t_id) for t_id in self.changed])
+        self.changed = set()
+        # entities whose waiting time is over
+        now = time.time()
+        delayed = self.delayed
+        self.delayed = []
+        for t_id in delayed:
+            if t_id in self.entries and t_id not in self.claimed:
+                if self.entries[t_id][4] <= now:
+                    self.push(t_id)
+                else:
+                    self.delayed.append(t_id)
+
+    def take(self, heap):
+        while heap:
+            key, order, t_id = heapq.heappop(heap)
+            if t_id in self.entries and t_id not in self.claimed \
+                    and self.entries[t_id][4] <= time.time() \
+                    and key == self.key(t_id):
+                self.claimed.add(t_id)
+                self.busy += 1
+                return t_id
+        return None
+
+    def pop(self, session_name, waiting_names):
+        # next entity for a session, its own first, then the ones of
+        # FloodWait blocked sessions and of sessions without a worker, None
+        # if there is nothing to do right now
+        self.reorder()
+        t_id = self.take(self.heaps.setdefault(session_name, []))
+        if t_id is None:
+            for name, heap in self.heaps.items():
+                if name != session_name and (name in waiting_names
+                                             or name not in self.active):
+                    t_id = self.take(heap)
+                    if t_id is not None:
+                        break
+        return t_id
+
+    def release(self, t_id):
+        self.claimed.discard(t_id)
+        self.busy -= 1
+        self.event.set()
+
+    def done(self, t_id):
+        self.entries.pop(t_id, None)
+        self.connection.execute('DELETE FROM schedule WHERE t_id = ?;', (t_id,))
+        self.db.commit()
+        self.release(t_id)
+
+    def retry(self, t_id, eligible, failed=False):
+        # failed counts as an attempt, waiting for a session does not
+        entry = self.entries[t_id]
+        if failed:
+            entry[3] += 1
+            if entry[3] >= self.max_attempts:
+                self.done(t_id)
+                return
+            eligible = max(eligible, time.time() +
+                           self.retry_delay * 2 ** (entry[3] - 1))
+        else:
+            eligible = max(eligible, time.time() + self.retry_delay)
+        entry[4] = eligible
+        self.connection.execute(
+            'UPDATE schedule SET attempts = ?, next_eligible_at = ? '
+            'WHERE t_id = ?;', (entry[3], entry[4], t_id))
+        self.db.commit()
+        self.release(t_id)
+        self.push(t_id)
+
+    def earliest(self):
+        # next_eligible_at of the first entity waiting for a retry, None if
+        # there is none
+        times = [self.entries[t_id][4] for t_id in self.delayed
+                 if t_id in self.entries and t_id not in self.claimed]
+        return min(times) if times else None
+
+    async def wait(self, timeout=None):
+        # until new work is added, a session finished an entity or timeout
+        # seconds passed
+        self.event.clear()
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
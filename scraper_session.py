@@ -0,0 +1,620 @@
+#!/usr/bin/python3
+import asyncio
+import heapq
+import time
+
+from datetime import datetime
+from scraper_cache import EntityCache
+from scraper_config import Initiator
+from scraper_model import SessionState, RequestState, RequestError, ScrapeError
+from telethon.tl.types import PeerUser, PeerChat, PeerChannel
+from telethon import errors, functions, TelegramClient, types
+
+
+class RateLimiter():
+    """Adaptive token bucket for the Telegram requests of one session.
+
+    Every request takes a token, tokens are refilled with rate per second.
+    A FloodWait of seconds halves the rate and no tokens are refilled until
+    it is over, relax_after accepted requests in a row raise the rate by
+    min_rate again, up to max_rate.
+    """
+    relax_after = 50
+
+    def __init__(self, rate, min_rate, max_rate):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.tokens = 1.0
+        self.stamp = time.monotonic()
+        self.successes = 0
+
+    def get_interval(self):
+        return 1 / self.rate
+
+    interval = property(get_interval)
+
+    def refill(self):
+        # the stamp is in the future while a FloodWait lasts
+        now = time.monotonic()
+        if now > self.stamp:
+            self.tokens = min(max(self.rate, 1.0),
+                              self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    async def acquire(self):
+        self.refill()
+        while self.tokens < 1:
+            await asyncio.sleep(max(self.stamp - time.monotonic(), 0) +
+                                (1 - self.tokens) / self.rate)
+            self.refill()
+        self.tokens -= 1
+
+    def success(self):
+        # returns True if the rate was raised
+        self.successes += 1
+        if self.successes >= self.relax_after and self.rate < self.max_rate:
+            self.successes = 0
+            self.rate = min(self.max_rate, self.rate + self.min_rate)
+            return True
+        return False
+
+    def flood(self, seconds):
+        self.successes = 0
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.stamp = time.monotonic() + seconds
+
+
+class Session():
+    framework = 'Telethon'
+
+    def __init__(self, name, api_id, api_hash, wait_until, rate, entity_cache=None,
+                 dialogs_loaded=0):
+        self.iniValues = Initiator('scraper.ini')
+        self.name = name
+        self.dialogs_loaded = dialogs_loaded
+        self.entity_cache = entity_cache
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.wait_until = wait_until
+        self.limiter = RateLimiter(rate,
+                                   self.iniValues.min_rate,
+                                   self.iniValues.max_rate)
+        # one entity at a time iterates the messages of the session
+        self.messages_lock = asyncio.Lock()
+        # statistics of the SessionPool
+        self.load = 0
+        self.requests = 0
+        self.busy_time = 0.0
+        self.waited_time = 0.0
+        self.flood_time = 0
+        try:
+            self.session_object = TelegramClient(name, api_id, api_hash)
+
+        except Exception as e:
+            print(e)
+            self.State = SessionState.Failed
+
+        else:
+            self.State = SessionState.Closed
+
+    async def connect(self):
+        # connect without login, sessions that are not authorized yet stay
+        # Closed and have to login()
+        try:
+            await self.session_object.connect()
+            if await self.session_object.is_user_authorized():
+                self.State = SessionState.Connected
+        except Exception as e:
+            print(e)
+            self.State = SessionState.Failed
+
+    async def login(self):
+        # asks for phone number and code on the console
+        try:
+            await self.session_object.start()
+        except Exception as e:
+            print(e)
+            self.State = SessionState.Failed
+
+        else:
+            self.State = SessionState.Connected
+
+    async def load_dialogs(self):
+        # the dialogs fill the entity cache of the Telethon session file,
+        # they are loaded again after [Telegram] dialogs_ttl hours
+        if not self.iniValues.warm_dialogs or self.State != SessionState.Connected:
+            return
+        if self.dialogs_loaded + self.iniValues.dialogs_ttl * 3600 > time.time():
+            return
+        try:
+            await self.session_object.get_dialogs()
+        except Exception as e:
+            print(e)
+        else:
+            self.dialogs_loaded = int(time.time())
+            self.iniValues.set_dialogs_loaded(self.name, self.dialogs_loaded)
+
+    async def get_me(self):
+        try:
+            return await self.session_object.get_me()
+
+        except Exception as e:
+            print(e)
+            self.State = SessionState.Failed
+
+    def is_waiting(self):
+        if self.wait_until > int(time.time()):
+            return True
+        else:
+            return False
+
+    waiting = property(is_waiting)
+
+    def accepted(self):
+        if self.limiter.success():
+            self.iniValues.set_rate(self.name, self.limiter.rate)
+
+    def flooded(self, wait):
+        self.limiter.flood(wait)
+        self.iniValues.set_rate(self.name, self.limiter.rate)
+
+    def set_wait(self, wait):
+        self.flood_time += wait
+        self.wait_until = int(time.time()) + wait
+        self.iniValues.set_wait(self.name, self.wait_until)
+        wait_until_str = str(datetime.fromtimestamp(self.wait_until))
+        print('\rSession ' + self.name +
+              ' FloodWait error, blocked until ' + wait_until_str)
+
+    async def get_entity_from_id(self, id, type):
+        # (entity, RequestState), the entity is empty if it was not found
+        await self.limiter.acquire()
+        try:
+            entity = None
+            if type == 'contact':
+                entity = await self.session_object.get_entity(
+                    PeerUser(id))
+            elif type == 'chat':
+                entity = await self.session_object.get_entity(
+                    PeerChat(id))
+            elif type == 'channel':
+                entity = await self.session_object.get_entity(
+                    PeerChannel(id))
+
+        except errors.rpcerrorlist.FloodWaitError as e:
+            wait = e.seconds
+            self.flooded(wait)
+            self.set_wait(wait)
+            return [], RequestState.FloodWait
+        # if ID could not be found, give back an empty entity
+        except ValueError:
+            return [], RequestState.NotFound
+
+        except Exception as e:
+            print('\r' + str(e))
+            return [], RequestState.Failed
+
+        self.accepted()
+        if entity == None:
+            entity = []
+        return entity, RequestState.Accepted
+
+    def cache_entity(self, key, entity):
+        # remember a resolved entity for all seeds
+        if self.entity_cache is None or key is None:
+            return
+        if isinstance(entity, types.User):
+            self.entity_cache.put(key, self.name, entity.id, 'contact',
+                                  entity.access_hash)
+        elif isinstance(entity, types.Chat):
+            self.entity_cache.put(key, self.name, entity.id, 'chat', None)
+        elif isinstance(entity, types.Channel):
+            self.entity_cache.put(key, self.name, entity.id, 'channel',
+                                  entity.access_hash)
+
+    async def get_cached_entity(self, key):
+        # (entity, RequestState) from the entity cache without resolving its
+        # name, the entity is None if the key is unknown or the entry is
+        # not usable
+        if self.entity_cache is None or key is None:
+            return None, RequestState.Idle
+        cached = self.entity_cache.get(key)
+        if cached is None:
+            return None, RequestState.Idle
+        session_name, peer_id, peer_type, access_hash = cached
+        # access hashes only work for the session that received them,
+        # other sessions have to know the peer from their own session file
+        if peer_type == 'chat':
+            peer = types.InputPeerChat(peer_id)
+        elif session_name == self.name and peer_type == 'contact':
+            peer = types.InputPeerUser(peer_id, access_hash)
+        elif session_name == self.name and peer_type == 'channel':
+            peer = types.InputPeerChannel(peer_id, access_hash)
+        elif peer_type == 'contact':
+            peer = PeerUser(peer_id)
+        else:
+            peer = PeerChannel(peer_id)
+
+        await self.limiter.acquire()
+        try:
+            entity = await self.session_object.get_entity(peer)
+
+        except errors.rpcerrorlist.FloodWaitError as e:
+            wait = e.seconds
+            self.flooded(wait)
+            self.set_wait(wait)
+            return None, RequestState.FloodWait
+
+        except Exception:
+            # unknown to this session or outdated, resolve the name again
+            return None, RequestState.NotFound
+
+        self.accepted()
+        return entity, RequestState.Accepted
+
+    async def get_entity_from_string(self, input):
+        # (entity, RequestState), the entity is empty if it was not found
+        key = EntityCache.key(input)
+        entity, state = await self.get_cached_entity(key)
+        if entity:
+            return entity, state
+        if state == RequestState.FloodWait:
+            return [], state
+
+        await self.limiter.acquire()
+        try:
+            entity = None
+            entity = await self.session_object.get_entity(input)
+
+        except errors.rpcerrorlist.FloodWaitError as e:
+            wait = e.seconds
+            self.flooded(wait)
+            self.set_wait(wait)
+            return [], RequestState.FloodWait
+
+        # if ID could not be found, give back an empty entity
+        except ValueError:
+            return [], RequestState.NotFound
+
+        except Exception as e:
+            print('\r' + str(e))
+            return [], RequestState.Failed
+
+        self.accepted()
+        if entity == None:
+            entity = []
+        self.cache_entity(key, entity)
+        return entity, RequestState.Accepted
+
+    async def get_chat_from_invite(self, string):
+        # failed requests raise a RequestError with their RequestState
+        state = RequestState.Called
+        while state != RequestState.Accepted:
+            await self.limiter.acquire()
+            try:
+                updates = await self.session_object(
+                    functions.messages.ImportChatInviteRequest(hash=string))
+                self.accepted()
+                if isinstance(updates, types.Updates):
+                    chat = updates.chats[0]
+                    if isinstance(chat, types.Channel):
+                        return(chat)
+                    else:
+                        return(None)
+                else:
+                    return(None)
+
+            except errors.rpcerrorlist.FloodWaitError as e:
+                wait = e.seconds
+                self.flooded(wait)
+                print('\rFloodWait, wait ', wait,
+                      ' seconds before Invitations can be requested again.')
+                if wait < self.iniValues.max_delay:
+                    await asyncio.sleep(wait)
+                else:
+                    self.set_wait(wait)
+                    return(None)
+
+            except errors.rpcerrorlist.InviteHashEmptyError:
+                raise RequestError(
+                    '\rcan not test empty invitation hash.',
+                    RequestState.NotFound)
+
+            except errors.rpcerrorlist.InviteHashExpiredError:
+                raise RequestError('\rInvitation hash: ' +
+                                   string + ' not valid anymore.',
+                                   RequestState.NotFound)
+
+            except errors.rpcerrorlist.InviteHashInvalidError:
+                raise RequestError('\rFaulty invitation hash.',
+                                   RequestState.NotFound)
+
+            except errors.rpcerrorlist.ChannelsTooMuchError:
+                raise RequestError(
+                    '\rUser ' + self.name + ' ist member of too many groups.')
+
+            except errors.rpcerrorlist.UsersTooMuchError:
+                raise RequestError('\rToo many active users')
+
+            except errors.rpcerrorlist.UserAlreadyParticipantError:
+                state = RequestState.Accepted
+
+            except Exception as e:
+                print('\r' + str(e))
+                raise RequestError('\rRequest Failed')
+
+    async def get_invite(self, string):
+        # failed requests raise a RequestError with their RequestState
+        while True:
+            await self.limiter.acquire()
+            try:
+                result = await self.session_object(
+                    functions.messages.CheckChatInviteRequest(hash=string))
+
+            except errors.rpcerrorlist.FloodWaitError as e:
+                wait = e.seconds
+                self.flooded(wait)
+                print('\rFloodWait, wait ', wait,
+                      ' befor Invitations can be requested again.')
+                if wait < self.iniValues.max_delay:
+                    await asyncio.sleep(wait)
+                else:
+                    self.set_wait(wait)
+                    raise RequestError('\rSession ' + self.name +
+                                       ' is FloodWait blocked.',
+                                       RequestState.FloodWait)
+
+            except errors.rpcerrorlist.InviteHashEmptyError:
+                raise RequestError(
+                    '\rCan not test empty invitation hash.',
+                    RequestState.NotFound)
+
+            except errors.rpcerrorlist.InviteHashExpiredError:
+                raise RequestError('\rInvitation hash: ' +
+                                   string + ' is not valid any more.',
+                                   RequestState.NotFound)
+
+            except errors.rpcerrorlist.InviteHashInvalidError:
+                raise RequestError('\rFaulty invitation hash.',
+                                   RequestState.NotFound)
+
+            except Exception as e:
+                print('\r' + str(e))
+                raise RequestError('\rRequest failed')
+
+            else:
+                self.accepted()
+                return(result)
+
+    async def iter_messages_takeout(self, request, entity, offset_id=0, min_id=0):
+        # request.state is Accepted only if all messages have been received.
+        # A session has one takeout, so the messages of only one entity are
+        # iterated at a time, other entities wait for the messages lock
+        self.iniValues = Initiator('scraper.ini')
+        request.state = RequestState.Called
+        if self.iniValues.max_messages == 0:
+            limit = None
+        else:
+            limit = self.iniValues.max_messages
+
+        try:
+            async with self.messages_lock:
+                await self.limiter.acquire()
+                # left over by an interrupted scrape, no other takeout of
+                # this session is running while the lock is held
+                if self.session_object.session.takeout_id:
+                    await self.session_object.end_takeout(success=False)
+
+                async with self.session_object.takeout(finalize=True,
+                                                       users=isinstance(
+                                                           entity, types.User),
+                                                       chats=isinstance(
+                                                           entity, types.Chat),
+                                                       channels=isinstance(
+                                                           entity, types.Channel),
+                                                       megagroups=getattr(
+                                                           entity, 'megagroup', False)
+                                                       ) as takeout:
+                    # a first small request raises TakeoutInitDelayError early
+                    await takeout.get_messages(entity, limit=1)
+                    async for message in takeout.iter_messages(entity,
+                                                               wait_time=self.limiter.interval,
+                                                               limit=limit,
+                                                               offset_id=offset_id,
+                                                               min_id=min_id
+                                                               ):
+                        yield message
+                    request.state = RequestState.Accepted
+                    self.accepted()
+
+                if self.session_object.session.takeout_id:
+                    await self.session_object.end_takeout(success=True)
+
+        except errors.TakeoutInitDelayError as e:
+            wait = e.seconds
+            print('\rInitDelay, wait ', wait,
+                  ' before Messages can be requested.')
+            request.state = RequestState.TakeoutWait
+            if wait < self.iniValues.max_delay:
+                await asyncio.sleep(wait)
+            else:
+                self.set_wait(wait)
+
+        except errors.rpcerrorlist.FloodWaitError as e:
+            wait = e.seconds
+            self.flooded(wait)
+            print('\rFloodWait, wait ', wait,
+                  ' before Messages can be requested again.')
+            request.state = RequestState.FloodWait
+            if wait < self.iniValues.max_delay:
+                await asyncio.sleep(wait)
+            else:
+                self.set_wait(wait)
+
+        except Exception as e:
+            print('\r' + str(e))
+            request.state = RequestState.Failed
+            raise RequestError('\rRequest Failed')
+
+    async def iter_messages_normal(self, request, entity, offset_id=0, min_id=0,
+                                   reverse=False):
+        # request.state is Accepted only if all messages have been received
+        self.iniValues = Initiator('scraper.ini')
+        request.state = RequestState.Called
+        rowcount = 0
+        try:
+            async with self.messages_lock:
+                # iter_messages waits wait_time between its chunked requests
+                await self.limiter.acquire()
+                async for message in self.session_object.iter_messages(
+                        entity,
+                        wait_time=self.limiter.interval,
+                        offset_id=offset_id,
+                        min_id=min_id,
+                        reverse=reverse):
+                    yield message
+                    rowcount += 1
+                    if self.iniValues.max_messages != 0:
+                        if rowcount >= self.iniValues.max_messages:
+                            break
+                request.state = RequestState.Accepted
+                self.accepted()
+
+        except errors.rpcerrorlist.FloodWaitError as e:
+            wait = e.seconds
+            self.flooded(wait)
+            print('\rFloodWait, wait ', wait,
+                  ' before messages can be requested again.')
+            request.state = RequestState.FloodWait
+            if wait < self.iniValues.max_delay:
+                await asyncio.sleep(wait)
+            else:
+                self.set_wait(wait)
+
+        except Exception as e:
+            print('\r' + str(e))
+            request.state = RequestState.Failed
+            raise RequestError('\rRequest failed')
+
+    def disconnect(self):
+        try:
+            self.session_object.disconnect()
+
+        except:
+            self.State = SessionState.Failed
+
+        else:
+            self.State = SessionState.Closed
+
+    def __del__(self):
+        # Sessions trennen
+        if self.State == SessionState.Connected:
+            try:
+                self.session_object.disconnect()
+
+            except:
+                self.State = SessionState.Failed
+
+            else:
+                self.State = SessionState.Closed
+
+
+class SessionPool():
+    """Hands out the sessions for Telegram requests.
+
+    The sessions are kept in a heap keyed by wait_until. Only idle sessions
+    that are not FloodWait blocked are handed out, the one with the fewest
+    requests first. Short requests that only resolve a name or an
+    invitation may share a busy session if no session is idle. If all
+    sessions are blocked or busy, acquire() sleeps until the first one is
+    available again instead of giving up. Every use has to be ended by
+    release(), which collects the statistics of the session.
+    """
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.started = time.monotonic()
+        self.heap = [(session.wait_until, i) for i, session in enumerate(sessions)]
+        heapq.heapify(self.heap)
+        self.released = asyncio.Event()
+
+    def update(self):
+        # wait_until is changed by the sessions, outdated heap items are
+        # replaced when they come to the top
+        while self.heap:
+            wait_until, i = self.heap[0]
+            if wait_until == self.sessions[i].wait_until:
+                return
+            heapq.heapreplace(self.heap, (self.sessions[i].wait_until, i))
+
+    def available(self):
+        # the sessions are taken from the top of the heap as long as their
+        # wait_until is over, the blocked ones below are not looked at
+        now = int(time.time())
+        ready = []
+        self.update()
+        while self.heap and self.heap[0][0] <= now:
+            ready.append(heapq.heappop(self.heap))
+            self.update()
+        for item in ready:
+            heapq.heappush(self.heap, item)
+        return [self.sessions[i] for wait_until, i in ready]
+
+    def earliest(self):
+        self.update()
+        return self.heap[0][0] if self.heap else None
+
+    async def acquire(self, resolve=False):
+        # an idle session, with resolve also a busy one if none is idle
+        if not self.sessions:
+            raise ScrapeError('No connected session available!')
+        started = time.monotonic()
+        available = self.available()
+        idle = [session for session in available if session.load == 0]
+        while not idle and not (resolve and available):
+            if available:
+                # all busy, until one is released
+                wait = None
+            else:
+                wait = max(self.earliest() - time.time(), 1)
+                print('\rAll sessions are FloodWait blocked, waiting until ' +
+                      str(datetime.fromtimestamp(self.earliest())))
+            self.released.clear()
+            try:
+                await asyncio.wait_for(self.released.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            available = self.available()
+            idle = [session for session in available if session.load == 0]
+        session = min(idle or available, key=lambda s: (s.load, s.requests))
+        session.waited_time += time.monotonic() - started
+        self.use(session)
+        return session
+
+    def use(self, session):
+        # also for sessions that are not chosen by acquire(), a session is
+        # busy while at least one use is in progress
+        if session.load == 0:
+            session.started = time.monotonic()
+        session.load += 1
+        session.requests += 1
+
+    def release(self, session):
+        session.load -= 1
+        if session.load == 0:
+            session.busy_time += time.monotonic() - session.started
+            self.released.set()
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        table_data = [["Session", "Requests", "Utilization",
+                       "Waited for (s)", "FloodWait (s)"]]
+        for session in self.sessions:
+            table_data.append([session.name,
+                               str(session.requests),
+                               str(round(min(session.busy_time / elapsed, 1) * 100, 1)) + '%',
+                               str(round(session.waited_time)),
+                               str(session.flood_time)])
+        return table_data
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+import multiprocessing
+import os
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from halo import Halo
+from scraper_model import ScrapeError
+
+
+def timed(function, args):
+    # runs a stage in a worker process, (result, seconds)
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+class Stage():
+    """A section of the analysis, computed by function(*results, *args).
+
+    results are the results of the stages named in requires, in that order.
+    A stage with a key is kept in the AnalysisCache under its name. Local
+    stages run in the analyzing process, like the ones that need its
+    database connection, all others in a worker process, so their function,
+    args and the results they require have to be picklable.
+    """
+
+    def __init__(self, name, function, args=(), requires=(), key=None,
+                 local=False):
+        self.name = name
+        self.function = function
+        self.args = tuple(args)
+        self.requires = list(requires)
+        self.key = key
+        self.local = local
+
+
+class StageRunner():
+    """Runs the stages of an analysis as soon as the stages they require are done.
+
+    Stages that do not depend on each other run at the same time in a pool
+    of worker processes, 0 uses one per core and 1 runs every stage in
+    the analyzing process, one after the other. Results found in the
+    AnalysisCache are taken from there without running the stage. Every
+    finished stage is shown with the seconds it took, timings() has the
+    table of all of them.
+
+    The workers are spawned, not forked, because the OpenMP threads of
+    networkit do not survive a fork.
+    """
+
+    def __init__(self, cache, workers=0):
+        self.cache = cache
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.stages = {}
+        self.results = {}
+        # stages not found in the cache
+        self.computed = set()
+        # future -> stage
+        self.running = {}
+        # [stage, seconds, where it ran]
+        self.finished = []
+        self.pool = None
+        self.spinner = Halo(spinner='dots')
+        self.started = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # stages still waiting are dropped, running ones are waited for
+        for future in self.running:
+            future.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+        return False
+
+    def add(self, *stages):
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ScrapeError('Analysis stage ' + stage.name +
+                                  ' is declared twice!')
+            self.stages[stage.name] = stage
+
+    def ready(self):
+        # stages not started yet whose required stages are done
+        started = set(self.results) | \
+            set(stage.name for stage in self.running.values())
+        return [stage for stage in self.stages.values()
+                if stage.name not in started and
+                all(name in self.results for name in stage.requires)]
+
+    def finish(self, stage, result, seconds, where):
+        self.results[stage.name] = result
+        if stage.key is not None and where != 'cache':
+            self.cache.put(stage.name, stage.key, result)
+        self.finished.append([stage.name, round(seconds, 2), where])
+        if where == 'cache':
+            self.spinner.succeed(
+                stage.name + ': unchanged, taken from the analysis cache')
+        else:
+            self.spinner.succeed(stage.name + ': ' + str(round(seconds, 2)) +
+                                 ' s (' + where + ')')
+
+    def start(self):
+        # starts every stage that is ready, True if one of them is done
+        # already, so more stages may be ready
+        done = False
+        for stage in self.ready():
+            if stage.key is not None and stage.name not in self.computed:
+                result = self.cache.get(stage.name, stage.key)
+                if result is not self.cache.missing:
+                    self.finish(stage, result, 0, 'cache')
+                    done = True
+                    continue
+            self.computed.add(stage.name)
+            if stage.local or self.workers == 1:
+                continue
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+            future = self.pool.submit(timed, stage.function,
+                                      tuple(self.results[name]
+                                            for name in stage.requires) +
+                                      stage.args)
+            self.running[future] = stage
+        if done:
+            return True
+        # local stages run while the workers are busy
+        for stage in self.ready():
+            self.spinner.start(self.status(stage))
+            result, seconds = timed(stage.function,
+                                    tuple(self.results[name]
+                                          for name in stage.requires) +
+                                    stage.args)
+            self.finish(stage, result, seconds,
+                        'local' if stage.local else 'inline')
+            return True
+        return False
+
+    def status(self, stage=None):
+        names = [running.name for running in self.running.values()]
+        if stage is not None:
+            names.append(stage.name)
+        return 'Running ' + ', '.join(names)
+
+    def run(self, names=None):
+        # runs the stages until the ones in names, all if None, are done,
+        # stages that do not lead to them may still be running
+        names = list(self.stages) if names is None else list(names)
+        for stage in self.stages.values():
+            for name in stage.requires:
+                if name not in self.stages:
+                    raise ScrapeError('Analysis stage ' + stage.name +
+                                      ' requires the unknown stage ' + name)
+        try:
+            while not all(name in self.results for name in names):
+                if self.start():
+                    continue
+                if not self.running:
+                    raise ScrapeError('Analysis stages ' + ', '.join(
+                        name for name in self.stages
+                        if name not in self.results) +
+                        ' require each other!')
+                self.spinner.start(self.status())
+                done, pending = wait(list(self.running),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = self.running.pop(future)
+                    result, seconds = future.result()
+                    self.finish(stage, result, seconds, 'worker')
+        finally:
+            self.spinner.stop()
+        return self.results
+
+    def timings(self):
+        # table of the finished stages and the time since the runner started
+        table_data = [["Stage", "Seconds", "Run in"]] + self.finished
+        table_data.append(["Total (wall clock)",
+                           round(time.perf_counter() - self.started, 2), ""])
+        return table_data
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+import hashlib
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def local_short(url, length=8):
+    # deterministic ID from the SHA-1 of the URL, same URL -> same ID
+    number = int.from_bytes(hashlib.sha1(url.encode('utf-8')).digest()[:8], 'big')
+    short = ''
+    for i in range(length):
+        number, rest = divmod(number, 62)
+        short = BASE62[rest] + short
+    return short
+
+
+class UrlShortener():
+    """Shortens the URLs found while scraping.
+
+    With [URL] shortener = local the short form is a hash based ID that is
+    computed right away. With shortener = tinyurl the URLs are collected in
+    batches of batch_size and shortened by a pool of worker threads, so a
+    slow TinyURL response never stops the scraping. Every URL is tried
+    retries times, URLs that can not be shortened keep their long form.
+    """
+
+    def __init__(self, backend, workers, batch_size, retries):
+        self.backend = backend
+        self.batch_size = max(batch_size, 1)
+        self.retries = max(retries, 1)
+        self.pending = []
+        self.futures = []
+        self.pool = None
+        if self.backend == 'tinyurl':
+            import pyshorteners
+            self.type_tiny = pyshorteners.Shortener()
+            self.pool = ThreadPoolExecutor(max_workers=max(workers, 1))
+        elif self.backend != 'local':
+            print('Unknown URL shortener ' + str(backend) +
+                  ', using local shortener.')
+            self.backend = 'local'
+
+    def shorten(self, url):
+        # returns the short form or None if it is delivered by results()
+        if self.backend == 'local':
+            return local_short(url)
+        self.pending.append(url)
+        if len(self.pending) >= self.batch_size:
+            self.submit()
+        return None
+
+    def submit(self):
+        if self.pending:
+            self.futures.append(
+                self.pool.submit(self.shorten_batch, self.pending))
+            self.pending = []
+
+    def shorten_batch(self, urls):
+        results = []
+        for url in urls:
+            short = url
+            for attempt in range(self.retries):
+                try:
+                    short = self.type_tiny.tinyurl.short(url)
+                    break
+                except Exception:
+                    if attempt < self.retries - 1:
+                        time.sleep(2 ** attempt)
+                    else:
+                        print("\nURL " + url + " could not be shortened!")
+            results.append((short, url))
+        return results
+
+    def results(self, wait=False):
+        # (short, url) pairs of all finished batches, with wait=True at
+        # the end of the seed the last, partial batch is submitted and all
+        # batches still waiting are finished first
+        if self.pool is None:
+            return []
+        if wait:
+            self.submit()
+        results = []
+        running = []
+        for future in self.futures:
+            if wait or future.done():
+                results.extend(future.result())
+            else:
+                running.append(future)
+        self.futures = running
+        return results
+
+    def cancel(self):
+        # drop the batches not started yet, used when scraping is interrupted
+        if self.pool:
+            for future in self.futures:
+                future.cancel()
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def close(self):
+        results = self.results(wait=True)
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+        return results
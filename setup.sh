@@ -14,6 +14,7 @@ sudo python3-m pip install --upgrade matplotlib
 sudo python3-m pip install --upgrade networkit
 sudo python3-m pip install --upgrade networkx
 sudo python3-m pip install --upgrade nltk
+sudo python3-m pip install --upgrade numpy
 sudo python3-m pip install --upgrade pillow 
 sudo python3-m pip install --upgrade pip 
 sudo python3-m pip install --upgrade powerlaw